@@ -0,0 +1,340 @@
+import csv
+import io
+import json
+import os
+import uuid
+from typing import Callable, Iterable, Iterator, List, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DataError, IntegrityError, ProgrammingError
+from sqlalchemy.orm import Session
+from siteseo.app.campus.app.info import validator
+from siteseo.app.campus.app.info.models import Address, Appuser, Student
+from siteseo.app.campus.app.info.schema import AppuserDto, ImportReport, RowError
+from siteseo.app.campus.app.util import hashing
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+READ_CHUNK_SIZE = 64 * 1024
+ON_CONFLICT = ("skip", "update")
+# what the database raises for one bad student row: a broken constraint or a value its column cannot take
+STUDENT_ROW_ERRORS = (IntegrityError, DataError, ProgrammingError)
+ADDRESS_FIELDS = ("street", "city", "state", "zip_code", "email", "phone_number", "country")
+
+
+def iter_json_array(stream, chunk_size: int = READ_CHUNK_SIZE) -> Iterator:
+    """
+    Yield the elements of a top-level JSON array one at a time.
+
+    The text is read `chunk_size` characters at a time and each element is
+    decoded with JSONDecoder.raw_decode as soon as it is complete, so only the
+    current element and one chunk are held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    state = "start"  # then "first", "value" (after a comma) and "after" (after an element)
+    while True:
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            chunk = stream.read(chunk_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+        if pos >= len(buffer):
+            raise ValueError("Unexpected end of JSON array")
+
+        char = buffer[pos]
+        if state == "start":
+            if char != "[":
+                raise ValueError("Expected a JSON array")
+            pos, state = pos + 1, "first"
+            continue
+        if char == "]" and state in ("first", "after"):
+            return
+        if state == "after":
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+            pos, state = pos + 1, "value"
+            continue
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # a number is only complete once the character after it has been read
+                if eof or (end < len(buffer) and buffer[end] in ",] \t\r\n"):
+                    break
+            except ValueError:
+                if eof:
+                    raise
+            chunk = stream.read(chunk_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+        yield value
+        pos, state = end, "after"
+
+
+def read_rows(file, file_type: str) -> Iterator[Tuple[int, dict]]:
+    """
+    (row number, raw record) for every record of a CSV or JSON upload, read as a stream.
+
+    `file` is the binary upload; CSV rows count from 2, after the header,
+    JSON elements from 1.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if file_type == "csv":
+            yield from enumerate(csv.DictReader(text), start=2)
+        elif file_type == "json":
+            yield from enumerate(iter_json_array(text), start=1)
+        else:
+            raise ValueError("Invalid file type. Supported types: csv, json")
+    finally:
+        text.detach()  # leave the upload open for its owner to close
+
+
+def _nest(record: dict) -> dict:
+    """
+    Shape a flat CSV row like a JSON user.
+
+    `address.street` style columns become the nested address, a role column
+    may list several roles separated by commas, and rows without an id get
+    their own instead of sharing the schema default.
+    """
+    record = {key: value for key, value in record.items() if key is not None and value != ""}
+    address = record.pop("address", None) or {}
+    for key in list(record):
+        if key.startswith("address."):
+            address[key.split(".", 1)[1]] = record.pop(key)
+    if address:
+        record["address"] = address
+    if isinstance(record.get("role"), str):
+        record["role"] = [role.strip() for role in record["role"].split(",") if role.strip()]
+    record.setdefault("id", str(uuid.uuid4()))
+    return record
+
+
+def _error(number: int, record: dict, message: str) -> RowError:
+    email = record.get("email") if isinstance(record, dict) else None
+    return RowError(row=number, email=email, error=message)
+
+
+def validate_users(rows: Iterable[Tuple[int, dict]]) -> Tuple[List[Tuple[int, AppuserDto]], List[RowError]]:
+    valid, errors = [], []
+    for number, record in rows:
+        try:
+            valid.append((number, AppuserDto(**_nest(record))))
+        except (ValidationError, TypeError, AttributeError) as e:
+            errors.append(_error(number, record, str(e)))
+    return valid, errors
+
+
+def _address_row(user: AppuserDto) -> dict:
+    return {"id": str(uuid.uuid4()), **{field: getattr(user.address, field) for field in ADDRESS_FIELDS}}
+
+
+def _user_row(user: AppuserDto, password: str, address_id: str) -> dict:
+    row = {
+        "id": user.id,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "password": password,
+        "is_active": user.is_active,
+        "roles": list(user.role),
+        "status": user.status,
+        "address_id": address_id,
+    }
+    if user.timestamp is not None:
+        row["timestamp"] = user.timestamp
+    return row
+
+
+def insert_users(users: List[Tuple[int, AppuserDto]], passwords: List[str], db: Session) -> Tuple[int, List[RowError]]:
+    """
+    Insert one chunk of validated users and their addresses in a single transaction.
+
+    Emails already taken, or repeated within the chunk, are reported instead
+    of inserted. Addresses and users each go in as one multi-row INSERT; if
+    that still hits a constraint the chunk is retried row by row inside
+    savepoints so only the offending rows are rejected.
+    """
+    errors, seen = [], set()
+    emails = [user.email for _, user in users]
+    taken = {email for (email,) in db.query(Appuser.email).filter(Appuser.email.in_(emails))}
+    rows = []
+    for (number, user), password in zip(users, passwords):
+        if user.email in taken or user.email in seen:
+            errors.append(RowError(row=number, email=user.email, error="email already exists"))
+            continue
+        seen.add(user.email)
+        address = _address_row(user)
+        rows.append((number, user.email, address, _user_row(user, password, address["id"])))
+    if not rows:
+        return 0, errors
+
+    try:
+        db.execute(insert(Address), [address for _, _, address, _ in rows])
+        db.execute(insert(Appuser), [user for _, _, _, user in rows])
+        db.commit()
+        return len(rows), errors
+    except IntegrityError:
+        db.rollback()
+
+    inserted = 0
+    for number, email, address, user in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(Address), [address])
+                db.execute(insert(Appuser), [user])
+            inserted += 1
+        except IntegrityError as e:
+            errors.append(RowError(row=number, email=email, error=str(e.orig)))
+    db.commit()
+    return inserted, errors
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_users(
+    rows: Iterable[Tuple[int, dict]],
+    db: Session,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    progress: Callable[[int, int], None] = None,
+) -> ImportReport:
+    """
+    Validate, hash and insert users chunk by chunk, collecting per-row errors.
+
+    Passwords of a chunk are hashed in the hashing pool while the previous
+    chunk is being inserted. `progress(inserted, failed)` is called after
+    every chunk.
+    """
+    report = ImportReport()
+    previous = None
+    for chunk in _chunks(rows, chunk_size):
+        users, errors = validate_users(chunk)
+        report.errors += errors
+        pending = hashing.submit([user.password for _, user in users])
+        if previous:
+            _insert(previous, db, report, progress)
+        previous = (users, pending)
+    if previous:
+        _insert(previous, db, report, progress)
+    report.failed = len(report.errors)
+    return report
+
+
+def _insert(batch, db: Session, report: ImportReport, progress=None):
+    users, pending = batch
+    inserted, errors = insert_users(users, pending.result(), db)
+    report.inserted += inserted
+    report.errors += errors
+    if progress:
+        progress(report.inserted, len(report.errors))
+
+
+def _upsert_statement(records: List[dict], on_conflict: str):
+    """
+    One multi-row INSERT .. ON CONFLICT (id) for records sharing the same columns.
+
+    Each returned row says whether it was inserted (xmax = 0) or updated;
+    rows left alone by DO NOTHING return nothing.
+    """
+    stmt = pg_insert(Student).values(records)
+    columns = [column for column in records[0] if column != "id"]
+    if on_conflict == "update" and columns:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Student.id],
+            set_={column: stmt.excluded[column] for column in columns},
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[Student.id])
+    return stmt.returning(literal_column("xmax = 0").label("inserted"))
+
+
+def _count(report: ImportReport, sent: int, result):
+    flags = [inserted for (inserted,) in result]
+    report.inserted += sum(flags)
+    report.updated += len(flags) - sum(flags)
+    report.skipped += sent - len(flags)
+
+
+def upsert_students(students: List[Tuple[int, dict]], db: Session, report: ImportReport, on_conflict: str = "skip"):
+    """
+    Upsert one chunk of validated students in a single transaction, counting into `report`.
+
+    Students are matched on id: `on_conflict="skip"` leaves existing students
+    untouched, `"update"` overwrites the columns present in the upload. Rows
+    without an id are always new. An id repeated within the chunk is applied
+    once, the other rows count as skipped. If a row breaks a constraint (an
+    unknown biodata_id or class_id) or holds a value its column rejects (a
+    malformed date) the chunk is retried row by row inside savepoints so only
+    the offending rows are rejected.
+    """
+    chunk: dict = {}
+    for number, record in students:
+        record.setdefault("id", str(uuid.uuid4()))
+        if record["id"] in chunk:
+            report.skipped += 1
+            if on_conflict == "skip":
+                continue
+        chunk[record["id"]] = (number, record)
+    groups: dict = {}
+    for number, record in chunk.values():
+        groups.setdefault(tuple(record), []).append((number, record))
+    if not groups:
+        return
+
+    counted = report.model_copy()
+    try:
+        for rows in groups.values():
+            records = [record for _, record in rows]
+            _count(counted, len(records), db.execute(_upsert_statement(records, on_conflict)))
+        db.commit()
+        report.inserted, report.updated, report.skipped = counted.inserted, counted.updated, counted.skipped
+        return
+    except STUDENT_ROW_ERRORS:
+        db.rollback()
+
+    for rows in groups.values():
+        for number, record in rows:
+            try:
+                with db.begin_nested():
+                    _count(report, 1, db.execute(_upsert_statement([record], on_conflict)))
+            except STUDENT_ROW_ERRORS as e:
+                report.errors.append(RowError(row=number, error=str(e.orig)))
+    db.commit()
+
+
+def import_students(
+    rows: Iterable[Tuple[int, dict]],
+    db: Session,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    progress: Callable[[int, int], None] = None,
+    on_conflict: str = "skip",
+) -> ImportReport:
+    """
+    Validate and upsert students chunk by chunk, one commit per chunk.
+
+    `progress(done, failed)` is called after every chunk, where done counts
+    inserted, updated and skipped rows.
+    """
+    if on_conflict not in ON_CONFLICT:
+        raise ValueError(f"Invalid on_conflict. Supported values: {', '.join(ON_CONFLICT)}")
+    report = ImportReport()
+    for chunk in _chunks(rows, chunk_size):
+        students, errors = validator.validate_student_chunk(chunk)
+        report.errors += errors
+        upsert_students(students, db, report, on_conflict)
+        if progress:
+            progress(report.inserted + report.updated + report.skipped, len(report.errors))
+    report.failed = len(report.errors)
+    return report
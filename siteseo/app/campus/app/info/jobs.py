@@ -0,0 +1,249 @@
+import datetime
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Optional, Set
+from sqlalchemy.orm import Session
+from siteseo.app.db.session import SessionLocal
+from siteseo.app.campus.app.info import service
+from siteseo.app.campus.app.info.models import ImportJob
+from siteseo.app.campus.app.info.schema import ImportJobResponse, ImportReport
+
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))
+IMPORT_DIR = os.getenv("IMPORT_DIR", os.path.join(tempfile.gettempdir(), "campus-imports"))
+JOB_POLL_SECONDS = 1.0
+HEARTBEAT_SECONDS = 30.0  # running jobs are marked alive this often, whatever their progress
+# A running job without a heartbeat for this long lost its process and is given up
+JOB_STALE_SECONDS = float(os.getenv("IMPORT_JOB_STALE_SECONDS", "120"))
+MAX_JOB_ERRORS = 1000  # row errors kept on the job, the counts stay exact
+IMPORTERS = {
+    "users": service.bulk_upload_users,
+    "students": service.bulk_upload_students,
+}
+
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _remove(path: Optional[str]):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def enqueue(kind: str, file: BinaryIO, file_type: str, db: Session, **options) -> ImportJob:
+    """
+    Copy the upload to IMPORT_DIR and queue it. Returns as soon as the file is on disk.
+
+    `options` are stored on the job and passed to its importer.
+    """
+    if kind not in IMPORTERS:
+        raise ValueError(f"Unknown import kind: {kind}")
+    if file_type not in ("csv", "json"):
+        raise ValueError("Invalid file type. Supported types: csv, json")
+    job = ImportJob(kind=kind, file_type=file_type, options=options, status="queued")
+    db.add(job)
+    db.flush()
+    os.makedirs(IMPORT_DIR, exist_ok=True)
+    path = job.file_path = os.path.join(IMPORT_DIR, f"{job.id}.{file_type}")
+    try:
+        with open(path, "wb") as out:
+            shutil.copyfileobj(file, out, 1024 * 1024)
+        job.total_bytes = os.path.getsize(path)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        _remove(path)
+        raise
+    db.refresh(job)
+    workers.wake()
+    return job
+
+
+def job_status(job: ImportJob) -> ImportJobResponse:
+    """Progress is the share of the file read so far, the ETA extrapolates from it."""
+    progress = 1.0 if job.status == "done" else (job.bytes_read or 0) / (job.total_bytes or 1)
+    eta = None
+    if job.status == "running" and job.started_at and job.heartbeat_at and 0 < progress < 1:
+        elapsed = (job.heartbeat_at - job.started_at).total_seconds()
+        eta = round(elapsed * (1 - progress) / progress, 1)
+    return ImportJobResponse(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        rows_done=job.rows_done or 0,
+        rows_failed=job.rows_failed or 0,
+        progress=round(min(progress, 1.0), 4),
+        eta_seconds=eta,
+        errors=job.errors or [],
+        error=job.error,
+    )
+
+
+def _fail_stale(db: Session):
+    """Fail running jobs whose process stopped sending heartbeats, and delete their files."""
+    cutoff = _now() - datetime.timedelta(seconds=JOB_STALE_SECONDS)
+    stale = db.query(ImportJob).filter(
+        ImportJob.status == "running", ImportJob.heartbeat_at < cutoff
+    ).with_for_update(skip_locked=True).all()
+    paths = []
+    for job in stale:
+        job.status, job.error, job.finished_at = "failed", "import worker stopped", _now()
+        paths.append(job.file_path)
+    db.commit()
+    for path in paths:
+        _remove(path)
+
+
+def _claim(db: Session) -> Optional[str]:
+    """
+    Take the oldest queued job, or None.
+
+    Every app process (one per gunicorn worker) runs a dispatcher on the same
+    table; SELECT ... FOR UPDATE SKIP LOCKED hands each queued job to exactly
+    one of them without making the others wait.
+    """
+    _fail_stale(db)
+    job = db.query(ImportJob).filter(ImportJob.status == "queued").order_by(
+        ImportJob.timestamp
+    ).with_for_update(skip_locked=True).first()
+    if job is None:
+        db.rollback()
+        return None
+    job_id = job.id
+    job.status, job.started_at, job.heartbeat_at = "running", _now(), _now()
+    db.commit()
+    return job_id
+
+
+def run_job(job_id: str):
+    """Import one claimed job. Progress goes through its own session so it is committed apart from the rows."""
+    db, status_db = SessionLocal(), SessionLocal()
+    job = status_db.get(ImportJob, job_id)
+    path = job.file_path
+    try:
+        with open(path, "rb") as file:
+
+            def progress(done: int, failed: int):
+                job.rows_done, job.rows_failed = done, failed
+                job.bytes_read = file.tell()
+                job.heartbeat_at = _now()
+                status_db.commit()
+
+            result = IMPORTERS[job.kind](file, job.file_type, db, progress, **(job.options or {}))
+        if isinstance(result, ImportReport):
+            job.rows_done = result.inserted + result.updated + result.skipped
+            job.rows_failed = result.failed
+            job.errors = [error.model_dump() for error in result.errors[:MAX_JOB_ERRORS]]
+        job.bytes_read = job.total_bytes
+        job.status = "done"
+    except Exception as e:
+        logger.exception("Import job %s failed", job_id)
+        db.rollback()
+        job.status, job.error = "failed", str(e)
+    finally:
+        try:
+            job.finished_at = _now()
+            status_db.commit()
+        finally:
+            db.close()
+            status_db.close()
+            _remove(path)
+
+
+class ImportWorkers:
+    """
+    Background import pool backed by the import_jobs table, no broker needed.
+
+    A dispatcher thread claims queued jobs while a worker slot is free and
+    runs them on a thread pool; hashing and inserts inside a job already fan
+    out to the hashing processes and the database. The dispatcher also sends
+    a heartbeat for its running jobs every HEARTBEAT_SECONDS, so the jobs of
+    a process that died are failed after JOB_STALE_SECONDS.
+    """
+
+    def __init__(self, size: int = IMPORT_WORKERS):
+        self.size = size
+        self._slots = threading.Semaphore(size)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running: Set[str] = set()
+        self._next_beat = 0.0
+
+    def start(self):
+        if self._thread is not None or self.size <= 0:
+            return
+        self._stop.clear()
+        self._pool = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="import")
+        self._thread = threading.Thread(target=self._dispatch, name="import-dispatch", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self, job_id: str):
+        try:
+            run_job(job_id)
+        finally:
+            self._running.discard(job_id)
+            self._slots.release()
+            self._wake.set()
+
+    def _beat(self):
+        running = list(self._running)
+        if not running:
+            return
+        db = SessionLocal()
+        try:
+            db.query(ImportJob).filter(
+                ImportJob.id.in_(running), ImportJob.status == "running"
+            ).update({"heartbeat_at": _now()}, synchronize_session=False)
+            db.commit()
+        except Exception:
+            logger.exception("Import dispatcher could not record a heartbeat")
+        finally:
+            db.close()
+
+    def _dispatch(self):
+        while not self._stop.is_set():
+            if time.monotonic() >= self._next_beat:
+                self._beat()
+                self._next_beat = time.monotonic() + HEARTBEAT_SECONDS
+            if not self._slots.acquire(timeout=JOB_POLL_SECONDS):
+                continue
+            db = SessionLocal()
+            try:
+                job_id = _claim(db)
+            except Exception:
+                logger.exception("Import dispatcher could not claim a job")
+                job_id = None
+            finally:
+                db.close()
+            if job_id is None:
+                self._slots.release()
+                self._wake.wait(JOB_POLL_SECONDS)
+                self._wake.clear()
+                continue
+            self._running.add(job_id)
+            self._pool.submit(self._run, job_id)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._pool.shutdown(wait=False)
+        self._thread = self._pool = None
+
+
+workers = ImportWorkers()
@@ -1,6 +1,6 @@
 from siteseo.app.db.base import Base
 import uuid
-from sqlalchemy import Column, DateTime, ForeignKey, Date
+from sqlalchemy import Column, DateTime, ForeignKey, Date, JSON, BigInteger
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.sql.sqltypes import Integer, String, Boolean
@@ -148,6 +148,28 @@ class AcademicHistory(Base):
     owner = relationship("Appuser", backref="academic_history")
 
 
+class ImportJob(Base):
+    """A roster upload waiting for or being processed by the import workers."""
+
+    __tablename__ = "import_jobs"
+    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    timestamp = Column(DateTime(), server_default=func.now())
+    kind = Column(String)  # "users" or "students"
+    file_type = Column(String)
+    file_path = Column(String)
+    options = Column(JSON)  # keyword arguments for the importer, e.g. on_conflict
+    status = Column(String, index=True, default="queued")  # queued, running, done, failed
+    total_bytes = Column(BigInteger, default=0)
+    bytes_read = Column(BigInteger, default=0)
+    rows_done = Column(Integer, default=0)
+    rows_failed = Column(Integer, default=0)
+    errors = Column(JSON)
+    error = Column(String)
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+
 # Additional model for assignment relationship (optional):
 # class Class_Teacher(Base):
 #     __tablename__ = "class_teacher"
@@ -1,15 +1,16 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
-from sqlalchemy.exc import IntegrityError
-from siteseo.app.campus.app.info import service
-from siteseo.app.campus.app.info.models import Appuser
-from typing import List
+from siteseo.app.campus.app.info import jobs, service
+from siteseo.app.campus.app.info.models import Appuser, ImportJob
+from typing import List, Literal
 from siteseo.app.campus.app.info.schema import (
     AppuserDto,
     SchoolDto,
     SchoolResponse,
     UserResponse,
     EnrollmentDto,
+    ImportJobResponse,
 )
 from espy_contact.util.enums import AccessRoleEnum
 from sqlalchemy.orm import Session
@@ -93,84 +94,65 @@ def assign_student_class(sid: str, cid: str, db: Session = Depends(get_db)):
     return service.assign_student_to_class(sid, cid, db)
 
 
-@router.post("/students/upload", status_code=status.HTTP_201_CREATED)
+def _queue_upload(kind: str, file: UploadFile, db: Session, **options) -> JSONResponse:
+    if file.content_type not in ("text/csv", "application/json"):
+        return JSONResponse(
+            content={"message": "Invalid file type. Supported types: csv, json"},
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        )
+    file_type = file.content_type.split("/")[1]
+    job = jobs.enqueue(kind, file.file, file_type, db, **options)
+    return JSONResponse(
+        content={"message": f"{kind.capitalize()} import queued.", "job_id": job.id},
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+
+
+@router.post("/students/upload", status_code=status.HTTP_202_ACCEPTED)
 async def upload_students(
-    file: UploadFile = File(...), db: Session = Depends(get_db)
-) -> int:
+    file: UploadFile = File(...),
+    on_conflict: Literal["skip", "update"] = Query(
+        "skip", description="What to do with students whose id already exists"
+    ),
+    db: Session = Depends(get_db),
+) -> JSONResponse:
     """
-    Uploads student data from a CSV or JSON file.
+    Queues student data from a CSV or JSON file for import.
 
     Args:
         file (UploadFile): The uploaded file.
+        on_conflict (str): "skip" keeps existing students as they are, "update"
+            overwrites them with the uploaded columns.
         db (Session): The database session object (dependency).
 
     Returns:
-        StudentUploadResponse: Response object containing information about the upload.
+        JSONResponse: The job id to poll at /imports/{job_id}.
     """
-    try:
-        if file.content_type not in ("text/csv", "application/json"):
-            raise ValueError(
-                "Invalid file type. Supported types: csv, json"
-            )  # Raise a specific exception
-
-        file_type = file.content_type.split("/")[1]
-        return service.bulk_upload_students(file.filename, file_type, db)
+    return await run_in_threadpool(_queue_upload, "students", file, db, on_conflict=on_conflict)
 
-    except IntegrityError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,  # Appropriate status code for constraint violations
-            detail={"message": "Error uploading students. Please check the data."},
-        ) from exc
-
-    except Exception as exc:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,  # Generic error handling
-            detail={"message": "An unexpected error occurred."},
-        ) from exc
 
-
-@router.post("/users/upload", status_code=status.HTTP_201_CREATED)
+@router.post("/users/upload", status_code=status.HTTP_202_ACCEPTED)
 async def upload_users(file: UploadFile = File(...), db: Session = Depends(get_db)):
     """
-    Uploads user data from a CSV or JSON file.
+    Queues user data from a CSV or JSON file for import.
 
     Args:
         file (UploadFile): The uploaded file.
         db (Session): The database session object (dependency).
 
     Returns:
-        int: The number of users successfully uploaded.
+        JSONResponse: The job id to poll at /imports/{job_id}.
     """
+    return await run_in_threadpool(_queue_upload, "users", file, db)
 
-    try:
-        if file.content_type not in ("text/csv", "application/json"):
-            return JSONResponse(
-                content={"message": "Invalid file type. Supported types: csv, json"},
-                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
-            )
-
-        file_type = file.content_type.split("/")[1]
-        uploaded_count = service.bulk_upload_users(file.filename, file_type, db)
-
-        return JSONResponse(
-            content={"message": f"{uploaded_count} users uploaded successfully."},
-            status_code=status.HTTP_201_CREATED,
-        )
-
-    except IntegrityError as e:
-        # Handle potential duplicate key errors
-        print(f"Error uploading users: {e}")
-        return JSONResponse(
-            content={"message": "Error uploading users. Please check the data."},
-            status_code=status.HTTP_409_CONFLICT,
-        )
 
-    except Exception as e:
-        print(f"Unexpected error during upload: {e}")
-        return JSONResponse(
-            content={"message": "An unexpected error occurred."},
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        )
+@router.get("/imports/{job_id}")
+def import_status(job_id: str, db: Session = Depends(get_db)) -> ImportJobResponse:
+    """Rows done and failed, progress through the file and ETA of an import job."""
+    job = db.get(ImportJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+    return jobs.job_status(job)
 
 
 @router.post("/attendance", status_code=status.HTTP_201_CREATED)
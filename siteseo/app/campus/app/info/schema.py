@@ -40,6 +40,32 @@ class AppuserDto(UserResponse):
         from_attributes = True
 
 
+class RowError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+
+class ImportReport(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: List[RowError] = []
+
+
+class ImportJobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    rows_done: int = 0
+    rows_failed: int = 0
+    progress: float = 0
+    eta_seconds: Optional[float] = None
+    errors: List[RowError] = []
+    error: Optional[str] = None
+
+
 class EnrollmentDto(UserResponse):
     dob: date
     gender: str
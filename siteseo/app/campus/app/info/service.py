@@ -1,7 +1,4 @@
 from siteseo.app.db.session import get_db
-import csv
-import json
-from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload, exc
 from espy_contact.util.enums import AccessRoleEnum
 from siteseo.app.campus.app.info.models import (
@@ -12,7 +9,7 @@ from siteseo.app.campus.app.info.models import (
     Student,
     Student_attendance,
 )
-from . import validator
+from . import importer
 from siteseo.app.campus.app.classroom.models import Classroom
 from siteseo.app.campus.app.info.schema import (
     AppuserDto,
@@ -21,9 +18,10 @@ from siteseo.app.campus.app.info.schema import (
     AddressDto,
     UserResponse,
     EnrollmentDto,
+    ImportReport,
 )
 from espy_contact import service
-from typing import List
+from typing import BinaryIO, Callable, List
 from siteseo.app.campus.app.util import converter
 import uuid
 import os
@@ -157,46 +155,25 @@ def add_user(user: AppuserDto, db: Session) -> Appuser:
     return new_user
 
 
-def bulk_upload_users(file_path: str, file_type: str, db: Session) -> int:
+def bulk_upload_users(
+    file: BinaryIO, file_type: str, db: Session, progress: Callable[[int, int], None] = None
+) -> ImportReport:
     """
     Uploads user data from a CSV or JSON file.
 
+    The file is read as a stream and rows are validated into AppuserDto and
+    inserted in chunks, one transaction per chunk, see importer.import_users.
+
     Args:
-        file_path (str): The path to the CSV or JSON file.
+        file (BinaryIO): The uploaded CSV or JSON file, opened in binary mode.
         file_type (str): "csv" or "json".
         db (Session): The database session object.
+        progress (Callable, optional): Called with (inserted, failed) after every chunk.
 
     Returns:
-        int: The number of users successfully uploaded.
+        ImportReport: Users inserted, and the rows that failed with their errors.
     """
-
-    uploaded_count = 0
-    with open(file_path, "r") as file:
-        if file_type == "csv":
-            reader = csv.DictReader(file)
-            for row in reader:
-                try:
-                    user_dto = AppuserDto(**row)  # Convert row to AppuserDto
-                    uploaded_count += 1
-                    add_user(user_dto, db)
-                except Exception as e:  # Catch general exceptions for data processing
-                    print(f"Error processing user data (row {reader.line_no}): {e}")
-
-        elif file_type == "json":
-            data = json.load(file)
-            for user_data in data:
-                try:
-                    user_dto = AppuserDto(**user_data)  # Convert data to AppuserDto
-                    uploaded_count += 1
-                    add_user(user_dto, db)
-                except Exception as e:  # Catch general exceptions for data processing
-                    print(
-                        f"Error processing user data (index {data.index(user_data)}): {e}"
-                    )
-        else:
-            raise ValueError("Invalid file type. Supported types: csv, json")
-
-    return uploaded_count
+    return importer.import_users(importer.read_rows(file, file_type), db, progress=progress)
 
 
 def delete_user(uid: str, db: Session) -> bool:
@@ -341,17 +318,29 @@ def add_school(schoolDto: SchoolDto, db: Session) -> SchoolResponse:
     )
 
 
-def bulk_upload_students(file_path: str, file_type: str, db: Session) -> int:
+def bulk_upload_students(
+    file: BinaryIO,
+    file_type: str,
+    db: Session,
+    progress: Callable[[int, int], None] = None,
+    on_conflict: str = "skip",
+) -> ImportReport:
     """
     Uploads student data from a spreadsheet (CSV) or JSON file.
 
     Args:
-        file_path (str): The path to the CSV or JSON file.
+        file (BinaryIO): The uploaded CSV or JSON file, opened in binary mode. It is
+            read as a stream, so large rosters are never held in memory at once.
         file_type (str): "csv" or "json".
         db (Session): The database session object.
+        progress (Callable, optional): Called with (done, failed) after every
+            IMPORT_CHUNK_SIZE rows.
+        on_conflict (str): "skip" (the default) leaves students whose id already
+            exists as they are, "update" overwrites them with the uploaded columns.
 
     Returns:
-        int: The number of students successfully uploaded.
+        ImportReport: How many students were inserted, updated or skipped, and
+            the rows that failed with the reason for each.
 
     Raises:
         ValueError: If an invalid file type is provided.
@@ -359,38 +348,9 @@ def bulk_upload_students(file_path: str, file_type: str, db: Session) -> int:
     """
 
     try:
-        uploaded_count = 0
-        with open(file_path, "r") as file:
-            if file_type == "csv":
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if validator.validate_student_data(row):
-                        try:
-                            student = Student(**row)
-                            db.add(student)
-                            db.commit()
-                            uploaded_count += 1
-                        except IntegrityError as e:
-                            print(
-                                f"Error uploading student: {e}"
-                            )  # Log or handle duplicate key errors
-            elif file_type == "json":
-                data = json.load(file)
-                for student_data in data:
-                    if validator.validate_student_data(student_data):
-                        try:
-                            student = Student(**student_data)
-                            db.add(student)
-                            db.commit()
-                            uploaded_count += 1
-                        except IntegrityError as e:
-                            print(
-                                f"Error uploading student: {e}"
-                            )  # Log or handle duplicate key errors
-            else:
-                raise ValueError("Invalid file type. Supported types: csv, json")
-        return uploaded_count
-
+        return importer.import_students(
+            importer.read_rows(file, file_type), db, progress=progress, on_conflict=on_conflict
+        )
     except Exception as e:
         raise Exception(f"An error occurred during bulk student upload: {e}") from e
 
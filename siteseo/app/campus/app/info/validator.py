@@ -1,3 +1,10 @@
+from typing import Dict, FrozenSet, List, Tuple
+from siteseo.app.campus.app.info.schema import RowError
+
+REQUIRED_STUDENT_FIELDS = ("date_of_birth", "id_card")
+STUDENT_FIELDS = frozenset(("id", "biodata_id", "date_of_birth", "id_card", "class_id"))
+
+
 def validate_student_data(data):
     """
     Validates student data based on your specific requirements.
@@ -15,3 +22,46 @@ def validate_student_data(data):
     if not all(field in data for field in ("date_of_birth", "id_card")):
         return False
     return True
+
+
+def _column_errors(columns: FrozenSet[str]) -> List[str]:
+    errors = []
+    missing = [field for field in REQUIRED_STUDENT_FIELDS if field not in columns]
+    if missing:
+        errors.append(f"missing required fields: {', '.join(missing)}")
+    unknown = sorted(columns - STUDENT_FIELDS)
+    if unknown:
+        errors.append(f"unknown columns: {', '.join(unknown)}")
+    return errors
+
+
+def validate_student_chunk(rows: List[Tuple[int, dict]]) -> Tuple[List[Tuple[int, dict]], List[RowError]]:
+    """
+    validate_student_data over a whole chunk of (row number, record) pairs.
+
+    Column checks run once per distinct set of keys, which for a CSV chunk
+    means once, and only the per-row checks for empty required values run on
+    every row. Empty strings are dropped so the database defaults apply, and
+    rows with objects or arrays as values (possible in JSON uploads) are
+    rejected, since no student column takes them.
+    """
+    column_errors: Dict[FrozenSet[str], List[str]] = {}
+    valid, errors = [], []
+    for number, record in rows:
+        if not isinstance(record, dict):
+            errors.append(RowError(row=number, error="not an object"))
+            continue
+        record = {key: value for key, value in record.items() if key is not None and value not in ("", None)}
+        nested = [key for key, value in record.items() if isinstance(value, (dict, list))]
+        if nested:
+            errors.append(RowError(row=number, error=f"not a single value: {', '.join(nested)}"))
+            continue
+        columns = frozenset(record)
+        if columns not in column_errors:
+            column_errors[columns] = _column_errors(columns)
+        problems = column_errors[columns]
+        if problems:
+            errors.append(RowError(row=number, error="; ".join(problems)))
+        else:
+            valid.append((number, record))
+    return valid, errors
@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Optional
+from espy_contact import service
+
+# Worker processes for bcrypt per app process, 0 hashes inline on the calling thread.
+# The CPUs are shared out between the gunicorn workers (WEB_CONCURRENCY) by default.
+HASH_WORKERS = int(os.getenv(
+    "HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // int(os.getenv("WEB_CONCURRENCY", "1"))))
+))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    The hashing pool, created on first use.
+
+    Imports first ask for it from a worker thread, and forking a process that
+    runs threads can copy locks held by other threads, so the workers are
+    spawned rather than forked.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None and HASH_WORKERS > 0:
+            _pool = ProcessPoolExecutor(
+                max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def hash_batch(passwords: List[str]) -> List[str]:
+    """bcrypt every password, in a worker process."""
+    return [service.encrypt_pass(password) for password in passwords]
+
+
+class PendingHashes:
+    """Hashes of one batch that are still being computed; result() waits for them in order."""
+
+    def __init__(self, futures: List[Future]):
+        self.futures = futures
+
+    def result(self) -> List[str]:
+        return [hashed for future in self.futures for hashed in future.result()]
+
+
+def submit(passwords: List[str]) -> PendingHashes:
+    """
+    Start hashing `passwords` across the pool and return without waiting.
+
+    The batch is split into one slice per worker. Imports submit batch N and
+    insert batch N-1 while it is hashed, so the database and the CPUs work at
+    the same time.
+    """
+    pool = get_pool()
+    if pool is None or not passwords:
+        done = Future()
+        done.set_result(hash_batch(passwords))
+        return PendingHashes([done])
+    size = -(-len(passwords) // HASH_WORKERS)
+    return PendingHashes([
+        pool.submit(hash_batch, passwords[start:start + size])
+        for start in range(0, len(passwords), size)
+    ])
+
+
+def close():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -1,5 +1,6 @@
 from siteseo.app.db.base import Base
-from sqlalchemy import Column,DateTime
+from sqlalchemy import Column,DateTime,ForeignKey,JSON,UniqueConstraint
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.sql.sqltypes import Integer,String,Boolean
 class Webbuilder(Base):
@@ -8,4 +9,33 @@ class Webbuilder(Base):
     content = Column(String)
     product_id = Column(Integer)
     is_live = Column(Boolean, default=False)
-    timestamp = Column(DateTime(), server_default=func.now())
\ No newline at end of file
+    timestamp = Column(DateTime(), server_default=func.now())
+
+class AuditRun(Base):
+    __tablename__ = "audit_runs"
+    id = Column(Integer, primary_key=True, index=True)
+    site = Column(String, index=True)
+    checks = Column(String)
+    pages = Column(Integer, default=0)
+    reanalyzed = Column(Integer, default=0)
+    started_at = Column(DateTime(), server_default=func.now())
+    finished_at = Column(DateTime(), nullable=True)
+    pages_audited = relationship("PageAudit", back_populates="run")
+
+
+class PageAudit(Base):
+    __tablename__ = "page_audits"
+    __table_args__ = (UniqueConstraint("run_id", "url"),)
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("audit_runs.id"), index=True)
+    url = Column(String, index=True)
+    status = Column(Integer, nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    report = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    reused = Column(Boolean, default=False)
+    # row holding the report of a reused page, the report is not copied into every run
+    source_id = Column(Integer, ForeignKey("page_audits.id"), nullable=True)
+    run = relationship("AuditRun", back_populates="pages_audited")
@@ -1,6 +1,34 @@
+from typing import List,Optional
 from pydantic import BaseModel,Field
 class Seo(BaseModel):
     url: str = Field(min_length=6, description="Your website url")
+class SeoAudit(Seo):
+    checks: Optional[List[str]] = Field(None, description="seo checks to run, all of them when empty")
+class SeoBatch(BaseModel):
+    urls: List[str] = Field(default_factory=list, max_length=10000, description="Page urls to audit")
+    sitemap: Optional[str] = Field(None, description="Sitemap url whose pages are audited too")
+    checks: List[str] = Field(["info"], description="seo checks to run on every page")
+    per_host: int = Field(4, ge=1, le=32, description="Concurrent pages per host")
+    deadline: float = Field(120, gt=0, le=1800, description="Seconds before unfinished pages are dropped")
+class SeoCrawl(Seo):
+    checks: List[str] = Field(["info"], description="seo checks to run on every page")
+    max_pages: int = Field(500, ge=1, le=50000, description="Pages audited in this run")
+    max_depth: int = Field(10, ge=0, le=100, description="Links followed away from the start url")
+    concurrency: int = Field(8, ge=1, le=64, description="Pages fetched at the same time")
+    delay: float = Field(0.5, ge=0, le=60, description="Seconds between requests to the same host")
+    resume: bool = Field(True, description="Continue an interrupted crawl of the same url")
+class SeoRun(BaseModel):
+    site: str = Field(min_length=3, description="Name the runs of one site are stored under")
+    urls: List[str] = Field(default_factory=list, max_length=50000, description="Page urls to audit")
+    sitemap: Optional[str] = Field(None, description="Sitemap url whose pages are audited too")
+    checks: List[str] = Field(["info"], description="seo checks to run on every page")
+    concurrency: int = Field(16, ge=1, le=64, description="Pages audited at the same time")
+class UrlBatch(BaseModel):
+    urls: List[str] = Field(min_length=1, max_length=10000, description="Urls to check")
+    concurrency: int = Field(50, ge=1, le=200, description="Urls checked at the same time")
+class DomainBatch(BaseModel):
+    domains: List[str] = Field(min_length=1, max_length=10000, description="Domains or site urls")
+    concurrency: int = Field(50, ge=1, le=200, description="Domains audited at the same time")
 class WebbuilderRequest(BaseModel):
     id: str
     content: str
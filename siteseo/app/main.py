@@ -2,19 +2,25 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from siteseo.app.db.base import Base
 from siteseo.app.db.session import engine
-from siteseo.app.router import routes,home,builder_routes
+from siteseo.app.router import routes,home,builder_routes,audit_routes
+from siteseo.app.service import fetcher
+from siteseo.app.service import workers
+from siteseo.app.service.browser_pool import pool as browser_pool
 from siteseo.app.campus.app.auth.auth import router as auth_router
 from siteseo.app.campus.app.info import router
 from siteseo.app.campus.app.classroom import routes as class_routes
 from siteseo.app.campus.app.tranx import router as tranx_router
 from siteseo.app.campus.app.messaging import routes as msg_route
 from siteseo.app.campus.app.horace import router as horace_route
+from siteseo.app.campus.app.util import hashing
+from siteseo.app.campus.app.info.jobs import workers as import_workers
 
 
 seo_app = FastAPI()
 seo_app.include_router(routes.router)
 seo_app.include_router(home.router)
 seo_app.include_router(builder_routes.router)
+seo_app.include_router(audit_routes.router)
 
 seo_app.include_router(router.router)
 seo_app.include_router(class_routes.router)
@@ -32,3 +38,19 @@ seo_app.add_middleware(
     allow_headers = ["*"]
 )
 Base.metadata.create_all(bind=engine)
+
+
+@seo_app.on_event("startup")
+async def start_import_workers():
+    # the browser pool starts on its first lease, so a missing Chromium only fails rendering audits
+    import_workers.start()
+
+
+@seo_app.on_event("shutdown")
+async def close_http_pool():
+    await fetcher.close()
+    await browser_pool.close()
+    workers.close()
+    import_workers.stop()
+    hashing.close()
+
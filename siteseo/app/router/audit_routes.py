@@ -0,0 +1,41 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from siteseo.app.db.models import AuditRun
+from siteseo.app.db.schema import SeoRun
+from siteseo.app.db.session import get_db
+from siteseo.app.service import audit_store, batch_serv
+router = APIRouter(
+    prefix='/seo/runs',
+    tags=['seo']
+)
+@router.post('')
+async def new_run(run: SeoRun):
+    """Store a new audit run of the site, re-analyzing only pages whose bytes changed."""
+    urls = list(run.urls)
+    if run.sitemap:
+        try:
+            urls += await batch_serv.sitemap_urls(run.sitemap, limit=50000)
+        except asyncio.TimeoutError as exc:
+            raise HTTPException(status_code=504, detail="Sitemap not read within the deadline") from exc
+    if not urls:
+        raise HTTPException(status_code=400, detail="Provide urls or a sitemap")
+    pages = audit_store.reaudit(run.site, urls, run.checks, run.concurrency)
+    return StreamingResponse(batch_serv.ndjson(pages), media_type="application/x-ndjson")
+@router.get('/{run_id}/diff')
+def run_diff(
+    run_id: int,
+    against: Optional[int] = Query(None, description="Older run, the previous run of the site when empty"),
+    db: Session = Depends(get_db),
+) -> dict:
+    run = db.get(AuditRun, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if against is None:
+        previous = audit_store.latest_run(db, run.site, run.checks, before=run_id)
+        if previous is None:
+            raise HTTPException(status_code=404, detail="No earlier run of this site")
+        against = previous.id
+    return audit_store.diff_runs(db, against, run_id)
@@ -1,8 +1,18 @@
+import asyncio
+import time
 from typing import List,Optional
-from fastapi import APIRouter, Query,Path
+from fastapi import APIRouter, HTTPException, Query,Path
+from fastapi.responses import StreamingResponse
 from siteseo.app.service import seo_serv
 from siteseo.app.service import play_serv
-from siteseo.app.db.schema import Seo
+from siteseo.app.service import batch_serv
+from siteseo.app.service import crawler
+from siteseo.app.service import domains
+from siteseo.app.service import email_auth
+from siteseo.app.service import link_health
+from siteseo.app.service import redirects
+from siteseo.app.service import tls_scan
+from siteseo.app.db.schema import DomainBatch, Seo, SeoAudit, SeoBatch, SeoCrawl, UrlBatch
 
 router = APIRouter(
     prefix='/seo',
@@ -10,18 +20,74 @@ router = APIRouter(
 )
 
 @router.post('/info')
-def seo_info(seo: Seo) -> dict:
-    result = seo_serv.get_page_info(seo.url)
+async def seo_info(
+    seo: Seo,
+    stream: bool = Query(False, description="Stop downloading once title, h1 and meta are found"),
+) -> dict:
+    result = await seo_serv.get_page_info(seo.url, stream)
     return {'detail': result}
 @router.post('/result')
-def seo_result(seo: str):
-    return seo_serv.get_page_info(seo)
+async def seo_result(seo: str):
+    return await seo_serv.get_page_info(seo)
 @router.post('/friendly')
-def url_friendliness(seo: Seo) -> dict:
-    return seo_serv.handle_friendly_url(seo.url)
+async def url_friendliness(seo: Seo) -> dict:
+    return await seo_serv.handle_friendly_url(seo.url)
+@router.post('/links')
+async def broken_links(seo: Seo) -> dict:
+    """Status, redirects and timeouts of every link on the page."""
+    return await link_health.page_link_health(seo.url)
 @router.post('/images')
-def image_test(seo: Seo) -> dict:
-    return play_serv.check_image(seo.url)
+async def image_test(seo: Seo) -> dict:
+    return await play_serv.check_image(seo.url)
+@router.post('/audit')
+async def full_audit(seo: SeoAudit) -> dict:
+    """All seo checks over one download and one parse of the page."""
+    try:
+        return await seo_serv.analyze(seo.url, seo.checks)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+@router.post('/batch')
+async def batch_audit(batch: SeoBatch):
+    """Audit many pages at once, streaming one NDJSON line per finished page."""
+    urls, deadline = list(batch.urls), batch.deadline
+    if batch.sitemap:
+        started = time.monotonic()
+        try:
+            urls += await batch_serv.sitemap_urls(batch.sitemap, deadline=deadline)
+        except asyncio.TimeoutError as exc:
+            raise HTTPException(status_code=504, detail="Sitemap not read within the deadline") from exc
+        deadline -= time.monotonic() - started
+    if not urls:
+        raise HTTPException(status_code=400, detail="Provide urls or a sitemap")
+    results = batch_serv.audit_urls(
+        urls[:batch_serv.MAX_BATCH_URLS], batch.checks, batch.per_host, deadline
+    )
+    return StreamingResponse(batch_serv.ndjson(results), media_type="application/x-ndjson")
+@router.post('/crawl')
+async def site_crawl(crawl: SeoCrawl):
+    """Crawl the site from `url` and audit every page, one NDJSON line per page."""
+    options = crawl.model_dump(exclude={"url", "resume"})
+    try:
+        site = crawler.Crawler.open(crawl.url, crawler.state_path(crawl.url), crawl.resume, **options)
+    except crawler.CrawlInProgress as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return StreamingResponse(batch_serv.ndjson(site.crawl()), media_type="application/x-ndjson")
+@router.post('/domain')
+async def domain_report(seo: Seo) -> dict:
+    """DNS health of the site's domain: SPF, DMARC, MX, A/AAAA and apex vs www."""
+    return await domains.domain_health(seo.url)
+@router.post('/email-auth')
+async def email_authentication(batch: DomainBatch):
+    """SPF include tree, DMARC and DKIM of every domain, one NDJSON line per domain."""
+    reports = email_auth.audit_domains(batch.domains, batch.concurrency)
+    return StreamingResponse(batch_serv.ndjson(reports), media_type="application/x-ndjson")
+@router.post('/redirects')
+async def redirect_chains(batch: UrlBatch):
+    """Every redirect hop of every url, one NDJSON line per url."""
+    chains = redirects.trace_many(batch.urls, batch.concurrency)
+    return StreamingResponse(batch_serv.ndjson(chains), media_type="application/x-ndjson")
 @router.post('/deprecated')
 def deprecated_html(v: Optional[List[str]] = Query(None)):
     return {"version": v}
@@ -29,9 +95,15 @@ def deprecated_html(v: Optional[List[str]] = Query(None)):
 def object_analysis(sid: int = Path(...,gt=5, le=10, lt=8) ):
     return {"sid": sid}
 @router.post('/socials')
-def social_media():
-    pass
-def dom_optimization():
-    pass
-def ssl_check():
-    pass
\ No newline at end of file
+async def social_media(seo: Seo) -> dict:
+    """Open Graph, Twitter card, JSON-LD and microdata, with preview images validated."""
+    return await seo_serv.social_preview(seo.url)
+@router.post('/dom')
+async def dom_optimization(seo: Seo) -> dict:
+    """DOM size, depth, inline bytes, render-blocking resources and duplicate ids."""
+    return await seo_serv.analyze(seo.url, ["dom"])
+@router.post('/ssl')
+async def ssl_check(batch: UrlBatch):
+    """Certificate chain, expiry, SAN coverage, TLS versions and HSTS per host, as NDJSON."""
+    reports = tls_scan.scan_many(batch.urls, batch.concurrency)
+    return StreamingResponse(batch_serv.ndjson(reports), media_type="application/x-ndjson")
\ No newline at end of file
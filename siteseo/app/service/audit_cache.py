@@ -0,0 +1,92 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+import httpx
+from siteseo.app.service import fetcher
+
+CACHE_TTL = float(os.getenv("SEO_CACHE_TTL", "300"))
+CACHE_SIZE = int(os.getenv("SEO_CACHE_SIZE", "1024"))
+
+
+class CachedAudit:
+    def __init__(self, report: dict, etag: str = None, last_modified: str = None):
+        self.report = report
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = time.monotonic()
+
+    def validators(self) -> dict:
+        """Conditional request headers, empty when the page sent no validators."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class AuditCache:
+    """
+    LRU of audit reports keyed by (check, url).
+
+    Entries younger than `ttl` are served as they are. Older entries are kept
+    until evicted so they can be revalidated with If-None-Match /
+    If-Modified-Since, and a 304 makes them fresh again.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL, maxsize: int = CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[CachedAudit]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def is_fresh(self, entry: CachedAudit) -> bool:
+        return time.monotonic() - entry.stored_at < self.ttl
+
+    def put(self, key: Hashable, report: dict, headers=None) -> CachedAudit:
+        headers = headers or {}
+        entry = CachedAudit(report, headers.get("etag"), headers.get("last-modified"))
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def touch(self, entry: CachedAudit):
+        entry.stored_at = time.monotonic()
+
+    def clear(self):
+        self._entries.clear()
+
+    async def revalidate(self, key: Hashable, url: str) -> Optional[dict]:
+        """
+        Cached report for `key` if it is still valid, else None.
+
+        Stale entries are checked with a conditional HEAD, for audits such as the
+        rendered image check that do not reuse the response body anyway.
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None
+        if self.is_fresh(entry):
+            return dict(entry.report)
+        validators = entry.validators()
+        if not validators:
+            return None
+        try:
+            response = await fetcher.fetch(url, method="HEAD", headers=validators)
+        except httpx.HTTPError:
+            return None
+        if response.status_code != 304:
+            return None
+        self.touch(entry)
+        return dict(entry.report)
+
+
+cache = AuditCache()
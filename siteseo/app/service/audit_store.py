@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import httpx
+from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
+from starlette.concurrency import run_in_threadpool
+from siteseo.app.db.models import AuditRun, PageAudit
+from siteseo.app.db.session import SessionLocal
+from siteseo.app.service import fetcher, seo_serv, workers
+
+COMMIT_EVERY = 200  # page rows per transaction while a run is being stored
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def latest_run(db: Session, site: str, checks: str = None, before: int = None) -> Optional[AuditRun]:
+    """Most recent finished run of `site`, optionally with the same checks or older than run `before`."""
+    query = db.query(AuditRun).filter(AuditRun.site == site, AuditRun.finished_at.isnot(None))
+    if checks is not None:
+        query = query.filter(AuditRun.checks == checks)
+    if before is not None:
+        query = query.filter(AuditRun.id < before)
+    return query.order_by(AuditRun.id.desc()).first()
+
+
+def previous_pages(db: Session, run: Optional[AuditRun]) -> Dict[str, tuple]:
+    """url -> (report row id, content hash, etag, last-modified) of a run, without loading the reports."""
+    if run is None:
+        return {}
+    rows = db.query(
+        PageAudit.url,
+        func.coalesce(PageAudit.source_id, PageAudit.id),
+        PageAudit.content_hash,
+        PageAudit.etag,
+        PageAudit.last_modified,
+    ).filter(PageAudit.run_id == run.id, PageAudit.error.is_(None))
+    return {url: (row_id, digest, etag, modified) for url, row_id, digest, etag, modified in rows}
+
+
+async def audit_page(url: str, checks: List[str], previous: tuple = None) -> dict:
+    """
+    Audit one page unless its bytes are the same as in the previous run.
+
+    The previous validators make the request conditional, so a 304 skips the
+    download as well. Otherwise the body is hashed and only analyzed when the
+    hash differs. Reused pages come back with `reused_from` set instead of a report.
+    """
+    headers = {}
+    if previous:
+        _, _, etag, modified = previous
+        if etag:
+            headers["If-None-Match"] = etag
+        if modified:
+            headers["If-Modified-Since"] = modified
+    try:
+        response = await fetcher.fetch(url, headers=headers)
+    except httpx.HTTPError as e:
+        return {"url": url, "error": str(e) or type(e).__name__}
+
+    page = {
+        "url": url,
+        "status": response.status_code,
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+    }
+    if previous and response.status_code == 304:
+        page["etag"] = page["etag"] or previous[2]
+        page["last_modified"] = page["last_modified"] or previous[3]
+        return {**page, "status": 200, "content_hash": previous[1], "reused_from": previous[0]}
+    if response.status_code >= 400:
+        return {**page, "error": f"HTTP {response.status_code}"}
+    page["content_hash"] = content_hash(response.content)
+    if previous and previous[1] == page["content_hash"]:
+        return {**page, "reused_from": previous[0]}
+    page["report"] = await workers.run(seo_serv.run_checks, response.content, checks)
+    return page
+
+
+def _open_run(db: Session, site: str, checks_key: str) -> Tuple[Optional[int], Dict[str, tuple], int]:
+    before = latest_run(db, site, checks_key)
+    previous = previous_pages(db, before)
+    run = AuditRun(site=site, checks=checks_key)
+    db.add(run)
+    db.commit()
+    return (before.id if before else None), previous, run.id
+
+
+def _store(db: Session, rows: List[PageAudit], sources: List[int]) -> Dict[int, dict]:
+    """Commit a batch of page rows and load the reports they reuse in one query."""
+    db.add_all(rows)
+    db.commit()
+    if not sources:
+        return {}
+    return dict(db.query(PageAudit.id, PageAudit.report).filter(PageAudit.id.in_(set(sources))))
+
+
+def _close_run(db: Session, run_id: int, pages: int, reanalyzed: int):
+    # finished_at comes from the database clock, like the started_at default
+    db.query(AuditRun).filter(AuditRun.id == run_id).update(
+        {"pages": pages, "reanalyzed": reanalyzed, "finished_at": func.now()},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def _line(page: dict, reused: bool) -> dict:
+    return {
+        "url": page["url"],
+        "reused": reused,
+        **({"error": page["error"]} if "error" in page else page.get("report") or {}),
+    }
+
+
+async def reaudit(
+    site: str, urls: Iterable[str], checks: Iterable[str] = ("info",), concurrency: int = 16
+) -> AsyncIterator[dict]:
+    """
+    Audit `urls` as a new stored run of `site`, re-analyzing only pages that changed.
+
+    Yields every page as it finishes and a summary with the run ids at the end,
+    ready to be passed to diff_runs. Reused pages point at the row holding
+    their report; they are yielded with it once their batch of COMMIT_EVERY
+    rows is stored. The database work runs in the threadpool so it never
+    blocks the event loop.
+    """
+    checks = [name for name in dict.fromkeys(checks) if name in seo_serv.CHECKS]
+    checks_key = ",".join(checks)
+    slots = asyncio.Semaphore(concurrency)
+    db = SessionLocal()
+    try:
+        before, previous, run_id = await run_in_threadpool(_open_run, db, site, checks_key)
+
+        async def audit(url: str) -> dict:
+            async with slots:
+                return await audit_page(url, checks, previous.get(url))
+
+        async def flush(rows: List[PageAudit], reused: List[tuple]) -> AsyncIterator[dict]:
+            reports = await run_in_threadpool(_store, db, rows, [source for _, source in reused])
+            for page, source in reused:
+                yield _line({**page, "report": reports.get(source)}, True)
+
+        rows, reused = [], []
+        pages = reanalyzed = 0
+        for finished in asyncio.as_completed([audit(url) for url in dict.fromkeys(urls)]):
+            page = await finished
+            source = page.pop("reused_from", None)
+            rows.append(PageAudit(run_id=run_id, reused=source is not None, source_id=source, **page))
+            pages += 1
+            if source is not None:
+                reused.append((page, source))
+            else:
+                reanalyzed += "report" in page
+                yield _line(page, False)
+            if len(rows) >= COMMIT_EVERY:
+                async for line in flush(rows, reused):
+                    yield line
+                rows, reused = [], []
+        async for line in flush(rows, reused):
+            yield line
+
+        await run_in_threadpool(_close_run, db, run_id, pages, reanalyzed)
+        yield {
+            "run": {
+                "id": run_id,
+                "previous_run": before,
+                "pages": pages,
+                "reanalyzed": reanalyzed,
+            }
+        }
+    finally:
+        db.close()
+
+
+def _pages(db: Session, run_id: int) -> Dict[str, tuple]:
+    """url -> (page row, its report or the one it reuses) of a run."""
+    source = aliased(PageAudit)
+    rows = db.query(PageAudit, source.report).outerjoin(source, PageAudit.source_id == source.id)
+    return {
+        page.url: (page, page.report if page.report is not None else report)
+        for page, report in rows.filter(PageAudit.run_id == run_id)
+    }
+
+
+def diff_runs(db: Session, old_run_id: int, new_run_id: int) -> dict:
+    """Pages added, removed and changed between two runs, with the report sections that changed."""
+    old, new = _pages(db, old_run_id), _pages(db, new_run_id)
+    changed, unchanged = {}, 0
+    for url in sorted(old.keys() & new.keys()):
+        (before, a), (after, b) = old[url], new[url]
+        if before.content_hash == after.content_hash and before.status == after.status and before.error == after.error:
+            unchanged += 1
+            continue
+        a, b = a or {}, b or {}
+        sections = sorted(name for name in a.keys() | b.keys() if a.get(name) != b.get(name))
+        if before.status != after.status:
+            sections.append("status")
+        if before.error != after.error:
+            sections.append("error")
+        if sections:
+            changed[url] = sections
+        else:
+            unchanged += 1  # the bytes changed but none of the audited results did
+    return {
+        "from": old_run_id,
+        "to": new_run_id,
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "changed": changed,
+        "unchanged": unchanged,
+    }
@@ -0,0 +1,108 @@
+import asyncio
+import gzip
+import json
+from collections import defaultdict
+from typing import AsyncIterator, Iterable, List, Set
+from urllib.parse import urlsplit
+from xml.etree import ElementTree
+from siteseo.app.service import fetcher, seo_serv
+
+MAX_BATCH_URLS = 10000
+SITEMAP_DEADLINE = 60.0
+
+
+def _locs(content: bytes):
+    """Yield (tag, loc) for every <loc> in a sitemap or sitemap index."""
+    root = ElementTree.fromstring(content)
+    kind = root.tag.rsplit("}", 1)[-1]
+    for el in root.iter():
+        if el.tag.rsplit("}", 1)[-1] == "loc" and el.text:
+            yield kind, el.text.strip()
+
+
+async def _sitemap_urls(sitemap_url: str, limit: int, depth: int, seen: Set[str]) -> List[str]:
+    seen.add(sitemap_url)
+    response = await fetcher.fetch(sitemap_url)
+    response.raise_for_status()
+    content = response.content
+    if sitemap_url.endswith(".gz") and content[:2] == b"\x1f\x8b":
+        content = gzip.decompress(content)
+
+    urls, children = [], []
+    for kind, loc in _locs(content):
+        (children if kind == "sitemapindex" else urls).append(loc)
+    urls = urls[:limit]
+    if depth <= 0:
+        return urls
+    for child in children:
+        if len(urls) >= limit:
+            break
+        if child in seen:
+            continue
+        try:
+            urls += await _sitemap_urls(child, limit - len(urls), depth - 1, seen)
+        except Exception:
+            continue  # an unreachable or broken child sitemap only loses its own pages
+    return urls
+
+
+async def sitemap_urls(
+    sitemap_url: str, limit: int = MAX_BATCH_URLS, deadline: float = SITEMAP_DEADLINE
+) -> List[str]:
+    """
+    Page urls listed in a sitemap, following one level of sitemap index.
+
+    Child sitemaps are fetched in order, each at most once, until `limit`
+    urls are collected. Raises asyncio.TimeoutError after `deadline` seconds.
+    """
+    return await asyncio.wait_for(_sitemap_urls(sitemap_url, limit, 1, set()), deadline)
+
+
+async def audit_urls(
+    urls: Iterable[str],
+    checks: Iterable[str] = ("info",),
+    per_host: int = 4,
+    deadline: float = 120.0,
+) -> AsyncIterator[dict]:
+    """
+    Run the seo_serv checks over many urls and yield each report as soon as it is done.
+
+    Every host gets its own semaphore of `per_host` slots so one big site cannot
+    hold all of the fetcher's connections. Whatever is still running when the
+    deadline expires is cancelled and reported as an error.
+    """
+    host_slots = defaultdict(lambda: asyncio.Semaphore(per_host))
+    checks = [name for name in dict.fromkeys(checks) if name in seo_serv.CHECKS]
+
+    async def audit(url: str) -> dict:
+        async with host_slots[urlsplit(url).netloc]:
+            try:
+                return {"url": url, **await seo_serv.analyze(url, checks)}
+            except Exception as e:
+                return {"url": url, "error": str(e)}
+
+    tasks = {asyncio.create_task(audit(url)): url for url in dict.fromkeys(urls)}
+    loop = asyncio.get_running_loop()
+    end = loop.time() + deadline
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = end - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield task.result()
+        for task in pending:
+            yield {"url": tasks[task], "error": "deadline exceeded"}
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def ndjson(results: AsyncIterator[dict]) -> AsyncIterator[str]:
+    async for result in results:
+        yield json.dumps(result) + "\n"
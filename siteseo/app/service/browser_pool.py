@@ -0,0 +1,112 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Set
+from playwright.async_api import async_playwright, Browser, BrowserContext
+from playwright.async_api import Error as PlaywrightError
+
+POOL_SIZE = int(os.getenv("SEO_BROWSERS", "2"))
+MAX_PAGES = int(os.getenv("SEO_BROWSER_MAX_PAGES", "200"))
+LEASE_TIMEOUT = float(os.getenv("SEO_BROWSER_LEASE_TIMEOUT", "60"))
+
+
+class PooledBrowser:
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.pages = 0
+
+
+class BrowserPool:
+    """
+    Long-lived Chromium instances shared by the rendering audits.
+
+    Each lease gets a fresh context on an idle browser, so audits do not share
+    cookies or cache, and the browser goes back to the pool afterwards. A
+    browser is relaunched once it has served `max_pages` leases or when it is
+    found disconnected (crashed) at lease time.
+
+    Chromium is launched on the first lease rather than at app startup, so
+    the rest of the app still runs where no browser is installed.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, max_pages: int = MAX_PAGES):
+        self.size = size
+        self.max_pages = max_pages
+        self._playwright = None
+        self._idle: asyncio.Queue = None
+        self._leased: Set[PooledBrowser] = set()
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        async with self._lock:
+            if self._idle is not None:
+                return
+            self._playwright = await async_playwright().start()
+            idle = asyncio.Queue()
+            try:
+                for _ in range(self.size):
+                    idle.put_nowait(await self._launch())
+            except Exception:
+                while not idle.empty():
+                    await self._discard(idle.get_nowait())
+                await self._playwright.stop()
+                self._playwright = None
+                raise
+            self._idle = idle
+
+    async def close(self):
+        async with self._lock:
+            if self._idle is None:
+                return
+            while not self._idle.empty():
+                await self._discard(self._idle.get_nowait())
+            for pooled in list(self._leased):
+                await self._discard(pooled)  # the audit using it fails with a closed browser
+            self._leased.clear()
+            self._idle = None
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _launch(self) -> PooledBrowser:
+        return PooledBrowser(await self._playwright.chromium.launch(headless=True))
+
+    async def _discard(self, pooled: PooledBrowser):
+        try:
+            await pooled.browser.close()
+        except PlaywrightError:
+            pass  # already gone
+
+    async def _renew(self, pooled: PooledBrowser) -> PooledBrowser:
+        await self._discard(pooled)
+        return await self._launch()
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[BrowserContext]:
+        if self._idle is None:
+            await self.start()
+        idle = self._idle
+        pooled = await asyncio.wait_for(idle.get(), LEASE_TIMEOUT)
+        self._leased.add(pooled)
+        try:
+            if not pooled.browser.is_connected() or pooled.pages >= self.max_pages:
+                self._leased.discard(pooled)
+                pooled = await self._renew(pooled)
+                self._leased.add(pooled)
+            context = await pooled.browser.new_context()
+            pooled.pages += 1
+            try:
+                yield context
+            finally:
+                try:
+                    await context.close()
+                except PlaywrightError:
+                    pass  # browser died mid-audit, it is renewed on its next lease
+        finally:
+            self._leased.discard(pooled)
+            if self._idle is idle:
+                idle.put_nowait(pooled)
+            else:
+                await self._discard(pooled)  # the pool was closed during the lease
+
+
+pool = BrowserPool()
@@ -0,0 +1,425 @@
+import asyncio
+import base64
+import fcntl
+import hashlib
+import json
+import math
+import os
+from collections import deque
+from typing import IO, AsyncIterator, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+import httpx
+from siteseo.app.service import fetcher, parsers, seo_serv, workers
+
+CRAWL_STATE_DIR = os.getenv("SEO_CRAWL_STATE_DIR", "/tmp/siteseo-crawls")
+CRAWL_DELAY = float(os.getenv("SEO_CRAWL_DELAY", "0.5"))
+FRONTIER_LIMIT = int(os.getenv("SEO_CRAWL_FRONTIER", "100000"))
+SAVE_EVERY = 100  # pages between state checkpoints
+BLOOM_ERROR_RATE = 0.001
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAMS = ("utm_", "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid")
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+
+
+def normalize_url(url: str, base: str = None) -> Optional[str]:
+    """
+    Canonical form used for dedup, None for links that are not http(s) pages.
+
+    Resolves against `base`, lowercases scheme and host, drops default ports,
+    fragments and tracking parameters, and sorts the query.
+    """
+    try:
+        parts = urlsplit(urljoin(base, url.strip()) if base else url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    host = parts.hostname.lower()
+    if port and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def analyze_page(content: bytes, url: str, checks: List[str]) -> dict:
+    """
+    Checks, canonical url and followable links of one page from its bytes.
+
+    Runs in the analysis pool, so it returns plain data instead of the soup.
+    """
+    soup = parsers.make_soup(content)
+    canonical = soup.find("link", rel="canonical", href=True)
+    robots_meta = soup.find("meta", attrs={"name": "robots"})
+    links = []
+    if robots_meta is None or "nofollow" not in robots_meta.get("content", "").lower():
+        links = [
+            normalize_url(link["href"], url)
+            for link in soup.find_all("a", href=True)
+            if "nofollow" not in (link.get("rel") or ())
+        ]
+    return {
+        "report": seo_serv.check_soup(soup, checks),
+        "canonical": normalize_url(canonical["href"], url) if canonical else None,
+        "links": list(dict.fromkeys(link for link in links if link)),
+    }
+
+
+class BloomFilter:
+    """
+    Fixed-size set of seen urls, sized for `capacity` entries at `error_rate`.
+
+    A false positive skips a page that was never crawled; false negatives do
+    not happen. 150k urls at 0.1% take about 270 KB.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE, bits: bytes = None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits else bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def to_dict(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "bits": base64.b64encode(bytes(self.bits)).decode(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BloomFilter":
+        return cls(data["capacity"], data["error_rate"], base64.b64decode(data["bits"]))
+
+    def approximate_len(self) -> int:
+        """Number of distinct items added, estimated from the share of bits set."""
+        ones = int.from_bytes(self.bits, "little").bit_count()
+        if ones >= self.size:
+            return self.capacity * 10
+        return round(-self.size / self.hashes * math.log(1 - ones / self.size))
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filters stacked as a crawl's budget grows.
+
+    A Bloom filter cannot be resized without its items, so when a resumed
+    crawl needs more room than the current filter has left, a new filter
+    sized for the extra urls takes the new entries and lookups check every
+    filter. The false positive rate stays near the sum of the layers' rates.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE, layers: List[BloomFilter] = None):
+        self.layers = layers or [BloomFilter(capacity, error_rate)]
+
+    @property
+    def capacity(self) -> int:
+        return sum(layer.capacity for layer in self.layers)
+
+    def reserve(self, items: int):
+        """Make sure `items` more urls can be added without overfilling."""
+        last = self.layers[-1]
+        if last.capacity - last.approximate_len() < items:
+            self.layers.append(BloomFilter(items, last.error_rate))
+
+    def add(self, item: str):
+        if item not in self:
+            self.layers[-1].add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in layer for layer in self.layers)
+
+    def to_dict(self) -> dict:
+        return {"layers": [layer.to_dict() for layer in self.layers]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ScalableBloomFilter":
+        layers = [BloomFilter.from_dict(layer) for layer in data.get("layers", [data])]
+        return cls(layers[0].capacity, layers=layers)
+
+
+class _HostThrottle:
+    """Spaces out requests to one host by `delay` seconds."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._next = 0.0
+
+    async def wait(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next)
+        self._next = slot + self.delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def state_path(url: str) -> str:
+    """Where the resumable state of a crawl starting at `url` is kept."""
+    name = hashlib.sha1((normalize_url(url) or url).encode()).hexdigest()
+    return os.path.join(CRAWL_STATE_DIR, f"{name}.json")
+
+
+class CrawlInProgress(RuntimeError):
+    pass
+
+
+def lock_state(path: str) -> IO:
+    """
+    Exclusive lock on the state file at `path`, held until the returned file is closed.
+
+    flock is dropped by the kernel when the holder exits, so a crashed crawl
+    never leaves the site locked. Raises CrawlInProgress while another crawl
+    of the same site is running.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    handle = open(f"{path}.lock", "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        raise CrawlInProgress(f"A crawl of this site is already running: {path}") from None
+    return handle
+
+
+class Crawler:
+    """
+    Breadth-first audit of one site with the seo_serv checks.
+
+    The frontier holds at most FRONTIER_LIMIT urls and seen urls live in a
+    Bloom filter, so memory stays bounded however large the site is.
+    robots.txt is honoured, including its Crawl-delay, and requests to the
+    same host are spaced by `delay` seconds. With a `path` the frontier and
+    filter are checkpointed as JSON and a later crawl resumes from them.
+    """
+
+    def __init__(
+        self,
+        start_url: str,
+        checks: Iterable[str] = ("info",),
+        max_pages: int = 500,
+        max_depth: int = 10,
+        concurrency: int = 8,
+        delay: float = CRAWL_DELAY,
+        path: str = None,
+    ):
+        unknown = set(checks) - set(seo_serv.CHECKS)
+        if unknown:
+            raise ValueError(f"Unknown checks: {', '.join(sorted(unknown))}")
+        start = normalize_url(start_url)
+        if start is None:
+            raise ValueError(f"Not an http(s) url: {start_url}")
+        self.start_url = start
+        self.host = urlsplit(start).hostname.removeprefix("www.")
+        self.checks = list(dict.fromkeys(checks))
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.delay = delay
+        self.path = path
+        self.visited = 0  # pages audited over every run of this crawl
+        # queued urls plus the canonical and final url of every audited page
+        self.seen = ScalableBloomFilter(self.seen_budget())
+        self.frontier = deque([(start, 0)])
+        self.seen.add(start)
+        self._lock: Optional[IO] = None
+        self._in_flight: Dict[asyncio.Task, tuple] = {}
+        self._robots: Dict[str, asyncio.Future] = {}
+        self._throttles: Dict[str, _HostThrottle] = {}
+
+    def seen_budget(self) -> int:
+        """Urls one run can add to the seen filter: the frontier plus the canonical and final url of every page."""
+        return FRONTIER_LIMIT + 3 * self.max_pages
+
+    @classmethod
+    def load(cls, path: str, **options) -> "Crawler":
+        """
+        Resume a checkpointed crawl.
+
+        `options` (max_pages, max_depth, concurrency, delay) apply to this
+        run. The checks cannot change halfway through a crawl, so different
+        ones raise ValueError.
+        """
+        with open(path) as f:
+            state = json.load(f)
+        checks = options.get("checks")
+        if checks is not None and list(dict.fromkeys(checks)) != state["options"]["checks"]:
+            raise ValueError(
+                f"This crawl was started with checks {', '.join(state['options']['checks'])}; "
+                "start it over to change them"
+            )
+        crawler = cls(state["start_url"], **{**state["options"], **options, "path": path})
+        crawler.visited = state["visited"]
+        crawler.frontier = deque(tuple(entry) for entry in state["frontier"])
+        crawler.seen = ScalableBloomFilter.from_dict(state["seen"])
+        crawler.seen.reserve(crawler.seen_budget())
+        return crawler
+
+    @classmethod
+    def open(cls, start_url: str, path: str, resume: bool = True, **options) -> "Crawler":
+        """
+        Lock the crawl state of `start_url` and resume it, or start over.
+
+        The lock is held until crawl() finishes, so two crawls of the same site
+        cannot overwrite each other's checkpoints.
+        """
+        lock = lock_state(path)
+        try:
+            if resume and os.path.exists(path):
+                crawler = cls.load(path, **options)
+            else:
+                crawler = cls(start_url, path=path, **options)
+        except BaseException:
+            lock.close()
+            raise
+        crawler._lock = lock
+        return crawler
+
+    def save(self):
+        # pages still being fetched go back to the front, a resumed crawl redoes them
+        frontier = list(self._in_flight.values()) + list(self.frontier)
+        state = {
+            "start_url": self.start_url,
+            "options": {
+                "checks": self.checks,
+                "max_depth": self.max_depth,
+                "concurrency": self.concurrency,
+                "delay": self.delay,
+            },
+            "visited": self.visited,
+            "frontier": frontier,
+            "seen": self.seen.to_dict(),
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+    def _in_scope(self, url: str) -> bool:
+        return urlsplit(url).hostname.removeprefix("www.") == self.host
+
+    def _enqueue(self, url: str, depth: int):
+        if url is None or url in self.seen or not self._in_scope(url):
+            return
+        if len(self.frontier) >= FRONTIER_LIMIT:
+            return
+        self.seen.add(url)
+        self.frontier.append((url, depth))
+
+    async def _load_robots(self, origin: str) -> RobotFileParser:
+        robots = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            response = await fetcher.fetch(robots.url)
+        except httpx.HTTPError:
+            robots.disallow_all = True  # RFC 9309: unreachable robots.txt means no crawling
+            return robots
+        if response.status_code >= 500:
+            robots.disallow_all = True
+        elif response.status_code >= 400:
+            robots.allow_all = True
+        else:
+            robots.parse(response.text.splitlines())
+        return robots
+
+    async def _robots_for(self, url: str) -> RobotFileParser:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if origin not in self._robots:
+            self._robots[origin] = asyncio.ensure_future(self._load_robots(origin))
+        return await self._robots[origin]
+
+    async def _visit(self, url: str, depth: int) -> dict:
+        robots = await self._robots_for(url)
+        if not robots.can_fetch(fetcher.USER_AGENT, url):
+            return {"url": url, "depth": depth, "skipped": "robots.txt"}
+        host = urlsplit(url).netloc
+        if host not in self._throttles:
+            self._throttles[host] = _HostThrottle(max(self.delay, float(robots.crawl_delay(fetcher.USER_AGENT) or 0)))
+        await self._throttles[host].wait()
+
+        try:
+            response = await fetcher.fetch(url)
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            return {"url": url, "depth": depth, "error": str(e) or type(e).__name__}
+        page = {"url": url, "depth": depth, "status": response.status_code}
+        final_url = normalize_url(str(response.url))
+        if final_url and final_url != url:
+            page["final_url"] = final_url
+            self.seen.add(final_url)
+        content_type = response.headers.get("content-type", "text/html").split(";")[0].strip().lower()
+        if response.status_code >= 400 or content_type not in HTML_TYPES:
+            return page
+
+        found = await workers.run(analyze_page, response.content, final_url or url, self.checks)
+        if found["canonical"]:
+            page["canonical"] = found["canonical"]
+            self.seen.add(found["canonical"])
+        page.update(found["report"])
+        if depth < self.max_depth:
+            for link in found["links"]:
+                self._enqueue(link, depth + 1)
+        return page
+
+    async def crawl(self) -> AsyncIterator[dict]:
+        """Yield one report per page as soon as it is audited, and a summary line at the end."""
+        audited = 0
+        try:
+            while self.frontier or self._in_flight:
+                while self.frontier and len(self._in_flight) < self.concurrency and audited + len(self._in_flight) < self.max_pages:
+                    url, depth = self.frontier.popleft()
+                    self._in_flight[asyncio.create_task(self._visit(url, depth))] = (url, depth)
+                if not self._in_flight:
+                    break
+                done, _ = await asyncio.wait(self._in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url, depth = self._in_flight.pop(task)
+                    try:
+                        page = task.result()
+                    except Exception as e:
+                        # a page that breaks the parser or the pool fails alone, the crawl goes on
+                        page = {"url": url, "depth": depth, "error": str(e) or type(e).__name__}
+                    if "skipped" not in page:
+                        audited += 1
+                        self.visited += 1
+                    yield page
+                    if self.path and self.visited % SAVE_EVERY == 0:
+                        self.save()
+        finally:
+            for task in self._in_flight:
+                task.cancel()
+            if self.path:
+                if self.frontier or self._in_flight:
+                    self.save()
+                elif os.path.exists(self.path):
+                    os.remove(self.path)  # finished, the next crawl starts over
+            if self._lock is not None:
+                self._lock.close()
+                self._lock = None
+        yield {
+            "crawl": {
+                "start_url": self.start_url,
+                "pages": audited,
+                "total_pages": self.visited,
+                "queued": len(self.frontier),
+                "complete": not self.frontier,
+            }
+        }
@@ -0,0 +1,100 @@
+from collections import Counter
+from bs4 import BeautifulSoup, Tag
+
+# Lighthouse "avoid an excessive DOM size" thresholds
+MAX_DOM_NODES = 1500
+MAX_DOM_DEPTH = 32
+MAX_CHILDREN = 60
+# Stylesheets for these media, and scripts of these types, do not hold up first paint
+NON_BLOCKING_MEDIA = ("print", "none")
+NON_BLOCKING_SCRIPT_TYPES = ("module", "application/ld+json", "application/json", "text/template")
+
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _blocking_stylesheet(tag: Tag) -> bool:
+    rel = [value.lower() for value in tag.get("rel") or ()]
+    if "stylesheet" not in rel or "alternate" in rel or tag.has_attr("disabled"):
+        return False
+    return tag.get("media", "all").strip().lower() not in NON_BLOCKING_MEDIA
+
+
+def _blocking_script(tag: Tag, in_head: bool) -> bool:
+    if not in_head or not tag.get("src"):
+        return False
+    if tag.has_attr("async") or tag.has_attr("defer"):
+        return False
+    return tag.get("type", "").strip().lower() not in NON_BLOCKING_SCRIPT_TYPES
+
+
+def dom_weight(soup: BeautifulSoup) -> dict:
+    """
+    DOM size and render cost of the parsed page in a single walk of the tree.
+
+    Counts element nodes, the deepest nesting and the widest parent, sums the
+    bytes of inline <style>, style="" and inline <script> code, lists the
+    stylesheets and head scripts that block first paint, and finds ids used
+    more than once. Every node is visited exactly once.
+    """
+    nodes = max_depth = max_children = 0
+    widest = None
+    style_bytes = style_attr_bytes = script_bytes = 0
+    blocking = []
+    ids = Counter()
+
+    # (element, depth, inside <head>) on an explicit stack, deep pages do not hit the recursion limit
+    stack = [(child, 1, False) for child in reversed(soup.contents) if isinstance(child, Tag)]
+    while stack:
+        tag, depth, in_head = stack.pop()
+        nodes += 1
+        max_depth = max(max_depth, depth)
+        in_head = in_head or tag.name == "head"
+
+        if tag.has_attr("id"):
+            ids[tag["id"]] += 1
+        if tag.has_attr("style"):
+            style_attr_bytes += _size(tag["style"])
+        if tag.name == "style":
+            style_bytes += _size(tag.get_text())
+        elif tag.name == "script":
+            if not tag.get("src"):
+                script_bytes += _size(tag.get_text())
+            elif _blocking_script(tag, in_head):
+                blocking.append({"type": "script", "url": tag["src"]})
+        elif tag.name == "link" and tag.get("href") and _blocking_stylesheet(tag):
+            blocking.append({"type": "stylesheet", "url": tag["href"]})
+
+        children = [child for child in tag.contents if isinstance(child, Tag)]
+        if len(children) > max_children:
+            max_children, widest = len(children), tag.name
+        stack.extend((child, depth + 1, in_head) for child in reversed(children))
+
+    duplicate_ids = sorted(name for name, count in ids.items() if count > 1)
+    warnings = []
+    if nodes > MAX_DOM_NODES:
+        warnings.append(f"{nodes} DOM nodes, keep it under {MAX_DOM_NODES}")
+    if max_depth > MAX_DOM_DEPTH:
+        warnings.append(f"DOM depth {max_depth}, keep it under {MAX_DOM_DEPTH}")
+    if max_children > MAX_CHILDREN:
+        warnings.append(f"<{widest}> has {max_children} children, keep it under {MAX_CHILDREN}")
+    if blocking:
+        warnings.append(f"{len(blocking)} render-blocking resources")
+    if duplicate_ids:
+        warnings.append(f"{len(duplicate_ids)} duplicate ids")
+
+    return {
+        "node_count": nodes,
+        "max_depth": max_depth,
+        "max_children": max_children,
+        "widest_element": widest,
+        "inline_style_bytes": style_bytes + style_attr_bytes,
+        "style_tag_bytes": style_bytes,
+        "style_attribute_bytes": style_attr_bytes,
+        "inline_script_bytes": script_bytes,
+        "render_blocking": blocking,
+        "duplicate_ids": duplicate_ids,
+        "warnings": warnings,
+        "optimized": not warnings,
+    }
@@ -1,63 +1,164 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+import dns.asyncresolver
+import dns.exception
 import dns.resolver
-import socket
-import requests
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlsplit
+from siteseo.app.service import redirects
 
-def check_spf_record(url):
-    domain = urlsplit(url).netloc
-    try:
-        # Perform a DNS query for SPF records
-        answers = dns.resolver.resolve(domain, "TXT")
-        # Check if any TXT record contains "v=spf1"
-        for rdata in answers:
-            for txt_string in rdata.strings:
-                print(txt_string)
-                if b"v=spf1" in txt_string:
-                    return txt_string
-                else:
-                    return False
-
-        print(f"No SPF record found for {domain}.")
-        return False
+DNS_TIMEOUT = float(os.getenv("SEO_DNS_TIMEOUT", "5"))
+DNS_CACHE_SIZE = int(os.getenv("SEO_DNS_CACHE_SIZE", "10000"))
+NEGATIVE_TTL = 60  # seconds to remember that a name has no such record
 
-    except dns.resolver.NXDOMAIN:
-        print(f"Domain {domain} does not exist.")
-        return False
-    except dns.resolver.NoAnswer:
-        print(f"No TXT records found for {domain}.")
-        return False
-    except dns.resolver.Timeout:
-        print("DNS query timeout. Check your internet connection or DNS server.")
-        return False
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        return False
-def resolve_to_same_url(url1):
+_resolver: Optional[dns.asyncresolver.Resolver] = None
+_cache: "OrderedDict[Tuple[str, str], Tuple[float, List[str]]]" = OrderedDict()
+_inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+
+def get_resolver() -> dns.asyncresolver.Resolver:
+    global _resolver
+    if _resolver is None:
+        _resolver = dns.asyncresolver.Resolver()
+        _resolver.lifetime = DNS_TIMEOUT
+    return _resolver
+
+
+def to_domain(url: str) -> str:
+    """Host name of a url, or the value itself when it is already a bare domain."""
+    host = urlsplit(url).hostname if "//" in url else url.split("/")[0].split(":")[0]
+    return (host or "").lower().rstrip(".")
+
+
+def _as_text(rdata) -> str:
+    strings = getattr(rdata, "strings", None)
+    if strings is not None:
+        return b"".join(strings).decode(errors="replace")
+    return rdata.to_text()
+
+
+def _evict():
+    """Drop expired answers, then the least recently used ones, until there is room."""
+    now = time.monotonic()
+    for key in [key for key, (expiry, _) in _cache.items() if expiry <= now]:
+        del _cache[key]
+    while len(_cache) >= DNS_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+async def _lookup(key: Tuple[str, str]) -> List[str]:
+    name, rdtype = key
     try:
-        original_string = url1
-        url2 = original_string.replace("https://", "https://www.")
+        answer = await get_resolver().resolve(name, rdtype)
+        records, ttl = [_as_text(rdata) for rdata in answer], answer.rrset.ttl
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        records, ttl = [], NEGATIVE_TTL
+    if len(_cache) >= DNS_CACHE_SIZE:
+        _evict()
+    _cache[key] = (time.monotonic() + ttl, records)
+    return records
+
+
+async def resolve(name: str, rdtype: str = "A") -> List[str]:
+    """
+    Records of `name` as text, [] when the name or record does not exist.
+
+    Answers are cached for their own TTL, keeping the DNS_CACHE_SIZE most
+    recently used, and concurrent lookups of the same name share one query. Timeouts and server failures raise DNSException.
+    """
+    key = (name.lower().rstrip("."), rdtype)
+    hit = _cache.get(key)
+    if hit and hit[0] > time.monotonic():
+        _cache.move_to_end(key)
+        return hit[1]
+    if key not in _inflight:
+        _inflight[key] = asyncio.ensure_future(_lookup(key))
+        _inflight[key].add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(_inflight[key])
+
 
-        # Resolve IP addresses for both URLs
-        ip_address_1 = socket.gethostbyname(url1)
-        ip_address_2 = socket.gethostbyname(url2)
+async def spf_record(domain: str) -> Optional[str]:
+    records = await resolve(domain, "TXT")
+    return next((txt for txt in records if txt.lower().startswith("v=spf1")), None)
 
-        # Check if the resolved IP addresses are the same
-        if ip_address_1 == ip_address_2:
-            return f"The URLs {url1} and {url2} resolve to the same IP address: {ip_address_1}"
 
+async def dmarc_record(domain: str) -> Optional[str]:
+    records = await resolve(f"_dmarc.{domain}", "TXT")
+    return next((txt for txt in records if txt.lower().startswith("v=dmarc1")), None)
+
+
+async def mx_records(domain: str) -> List[str]:
+    return sorted(await resolve(domain, "MX"), key=lambda mx: int(mx.split()[0]))
+
+
+async def addresses(host: str) -> dict:
+    ipv4, ipv6 = await asyncio.gather(resolve(host, "A"), resolve(host, "AAAA"))
+    return {"A": ipv4, "AAAA": ipv6}
+
+
+async def same_apex_www(domain: str) -> dict:
+    """Whether the apex and www host resolve to the same addresses."""
+    apex = domain.removeprefix("www.")
+    apex_ips, www_ips = await asyncio.gather(addresses(apex), addresses(f"www.{apex}"))
+    apex_set = set(apex_ips["A"] + apex_ips["AAAA"])
+    www_set = set(www_ips["A"] + www_ips["AAAA"])
+    return {
+        "apex": apex_ips,
+        "www": www_ips,
+        "same": bool(apex_set) and apex_set == www_set,
+    }
+
+
+async def domain_health(url: str) -> dict:
+    """SPF, DMARC, MX, A/AAAA and apex/www comparison, all looked up in parallel."""
+    domain = to_domain(url).removeprefix("www.")
+    checks = {
+        "spf": spf_record(domain),
+        "dmarc": dmarc_record(domain),
+        "mx": mx_records(domain),
+        "addresses": addresses(domain),
+        "www": same_apex_www(domain),
+    }
+    results = await asyncio.gather(*checks.values(), return_exceptions=True)
+    report = {"domain": domain}
+    for name, result in zip(checks, results):
+        if isinstance(result, dns.exception.DNSException):
+            report[name] = {"error": str(result) or type(result).__name__}
+        elif isinstance(result, Exception):
+            raise result
         else:
-            return f"The URLs {url1} and {url2} do not resolve to the same IP address. {url1} - {ip_address_1}, {url2} - {ip_address_2}"
+            report[name] = result
+    return report
+
+
+async def check_spf_record(url):
+    """The SPF TXT record of the url's domain, False when there is none."""
+    try:
+        return await spf_record(to_domain(url)) or False
+    except dns.exception.DNSException as e:
+        print(f"An error occurred: {e}")
+        return False
 
-    except socket.error as e:
+
+async def resolve_to_same_url(url1):
+    domain = to_domain(url1).removeprefix("www.")
+    try:
+        result = await same_apex_www(domain)
+    except dns.exception.DNSException as e:
         print(f"Error: {e}")
         return None
-def has_redirect(url):
-    try:
-        response = requests.head(url, allow_redirects=False)
-        # Check the status code for redirects
-        if 300 <= response.status_code < 400:
-            return response.headers["Location"]
-        else:
-            return None
-    except requests.RequestException as e:
-        print(f"Error {e}")
\ No newline at end of file
+    apex_ips, www_ips = result["apex"]["A"], result["www"]["A"]
+    if result["same"]:
+        return f"The URLs {domain} and www.{domain} resolve to the same IP address: {', '.join(apex_ips)}"
+    return f"The URLs {domain} and www.{domain} do not resolve to the same IP address. {domain} - {', '.join(apex_ips)}, www.{domain} - {', '.join(www_ips)}"
+
+
+async def has_redirect(url):
+    """Location of the first redirect of `url`, None when it does not redirect."""
+    chain = await redirects.trace(url, max_hops=0)
+    if chain["error"]:
+        print(f"Error {chain['error']}")
+        return None
+    return chain["hops"][0]["location"] if chain["hops"] else None
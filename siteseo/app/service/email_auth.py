@@ -0,0 +1,185 @@
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Dict, Iterable, Tuple
+import dns.exception
+from siteseo.app.service import domains
+
+SPF_LOOKUP_LIMIT = 10  # RFC 7208 section 4.6.4
+SPF_MEMO_TTL = float(os.getenv("SEO_SPF_MEMO_TTL", "300"))
+DKIM_SELECTORS = (
+    "default", "google", "selector1", "selector2", "k1", "k2", "s1", "s2",
+    "mail", "dkim", "smtp", "mandrill", "mxvault", "zoho",
+)
+# Mechanisms and modifiers that cost a DNS lookup when an SPF record is evaluated
+LOOKUP_TERMS = ("include", "a", "mx", "ptr", "exists", "redirect")
+
+_memo: Dict[str, Tuple[float, dict]] = {}
+
+
+class _Budget:
+    def __init__(self, lookups: int):
+        self.remaining = lookups
+
+
+def _parse_terms(record: str):
+    """(qualifier, name, value) for every term after v=spf1."""
+    for term in record.split()[1:]:
+        qualifier = term[0] if term[0] in "+-~?" else ""
+        body = term[len(qualifier):]
+        if "=" in body and ":" not in body.split("=", 1)[0]:
+            name, value = body.split("=", 1)
+        else:
+            name, _, value = body.partition(":")
+            name = name.split("/")[0]
+        yield qualifier, name.lower(), value
+
+
+async def _expand(domain: str, budget: _Budget, path: frozenset) -> dict:
+    """
+    SPF record of `domain` with its include/redirect targets expanded concurrently.
+
+    Lookups are charged against the shared budget; once it is spent the tree
+    stops growing. Fully expanded subtrees are memoized per domain, and a memo
+    hit charges the whole subtree's lookups without querying again.
+    """
+    if domain in path:
+        return {"domain": domain, "error": "include loop", "lookups": 0}
+    hit = _memo.get(domain)
+    if hit and hit[0] > time.monotonic():
+        budget.remaining -= hit[1]["lookups"]
+        return hit[1]
+
+    node = {"domain": domain, "record": None, "lookups": 0, "includes": [], "redirect": None}
+    try:
+        node["record"] = await domains.spf_record(domain)
+    except dns.exception.DNSException as e:
+        node["error"] = f"temperror: {e or type(e).__name__}"
+        return node
+    if node["record"] is None:
+        node["error"] = "no SPF record"
+        return node
+
+    targets = []
+    for qualifier, name, value in _parse_terms(node["record"]):
+        if name in LOOKUP_TERMS:
+            node["lookups"] += 1
+        if name in ("include", "redirect"):
+            if "%{" in value:
+                # macros depend on the sender, they cannot be expanded here
+                node.setdefault("unexpanded", []).append(value)
+            else:
+                targets.append((name, value.lower().rstrip(".")))
+        elif name == "all":
+            node["all"] = (qualifier or "+") + "all"
+    budget.remaining -= node["lookups"]
+    if budget.remaining < 0:
+        node["error"] = "lookup budget exhausted"
+        return node
+
+    children = await asyncio.gather(
+        *(_expand(target, budget, path | {domain}) for _, target in targets)
+    )
+    for (kind, _), child in zip(targets, children):
+        node["lookups"] += child["lookups"]
+        if kind == "include":
+            node["includes"].append(child)
+        else:
+            node["redirect"] = child
+    if not _errors(node):
+        if len(_memo) >= domains.DNS_CACHE_SIZE:
+            _memo.clear()
+        _memo[domain] = (time.monotonic() + SPF_MEMO_TTL, node)
+    return node
+
+
+def _errors(node: dict) -> list:
+    errors = [f"{node['domain']}: {node['error']}"] if node.get("error") else []
+    for child in node.get("includes", []) + [node.get("redirect")]:
+        if child:
+            errors += _errors(child)
+    return errors
+
+
+async def spf_audit(domain: str, lookup_limit: int = SPF_LOOKUP_LIMIT) -> dict:
+    tree = await _expand(domain, _Budget(lookup_limit), frozenset())
+    errors = _errors(tree)
+    if tree["lookups"] > lookup_limit:
+        errors.append(f"{tree['lookups']} DNS lookups, the limit is {lookup_limit}")
+    return {
+        "record": tree.get("record"),
+        "all": tree.get("all"),
+        "lookups": tree["lookups"],
+        "valid": tree.get("record") is not None and not errors,
+        "errors": errors,
+        "tree": tree,
+    }
+
+
+async def dmarc_audit(domain: str) -> dict:
+    record = await domains.dmarc_record(domain)
+    if record is None:
+        return {"record": None, "policy": None, "valid": False}
+    tags = {
+        key.strip().lower(): value.strip()
+        for key, _, value in (tag.partition("=") for tag in record.split(";"))
+        if key.strip()
+    }
+    return {
+        "record": record,
+        "policy": tags.get("p"),
+        "subdomain_policy": tags.get("sp"),
+        "pct": int(tags["pct"]) if tags.get("pct", "").isdigit() else 100,
+        "rua": tags.get("rua"),
+        "ruf": tags.get("ruf"),
+        "valid": tags.get("p") in ("none", "quarantine", "reject"),
+    }
+
+
+async def dkim_audit(domain: str, selectors: Iterable[str] = DKIM_SELECTORS) -> dict:
+    """Look up the common DKIM selectors in parallel; a key with an empty p= is revoked."""
+    selectors = list(selectors)
+    answers = await asyncio.gather(
+        *(domains.resolve(f"{selector}._domainkey.{domain}", "TXT") for selector in selectors),
+        return_exceptions=True,
+    )
+    found = {}
+    for selector, records in zip(selectors, answers):
+        if isinstance(records, dns.exception.DNSException):
+            continue
+        record = next((txt for txt in records if "p=" in txt), None)
+        if record:
+            key = record.split("p=", 1)[1].split(";")[0].strip()
+            found[selector] = {"record": record, "revoked": not key}
+    return {"selectors": found, "found": any(not s["revoked"] for s in found.values())}
+
+
+async def email_auth(domain: str) -> dict:
+    """SPF include tree, DMARC policy and DKIM selectors of one domain."""
+    domain = domains.to_domain(domain).removeprefix("www.")
+    spf, dmarc, dkim = await asyncio.gather(
+        spf_audit(domain), dmarc_audit(domain), dkim_audit(domain), return_exceptions=True
+    )
+    report = {"domain": domain}
+    for name, result in (("spf", spf), ("dmarc", dmarc), ("dkim", dkim)):
+        if isinstance(result, dns.exception.DNSException):
+            result = {"error": str(result) or type(result).__name__}
+        elif isinstance(result, Exception):
+            raise result
+        report[name] = result
+    return report
+
+
+async def audit_domains(names: Iterable[str], concurrency: int = 50) -> AsyncIterator[dict]:
+    """email_auth over many domains, yielding each report as it completes."""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def audit(name: str) -> dict:
+        async with slots:
+            try:
+                return await email_auth(name)
+            except Exception as e:
+                return {"domain": name, "error": str(e)}
+
+    for report in asyncio.as_completed([audit(name) for name in dict.fromkeys(names)]):
+        yield await report
@@ -1,5 +1,85 @@
+from urllib.parse import urljoin
+import numpy as np
+from siteseo.app.service import image_weight
+
+# Columns of the array built by image_table
+IMAGE_COLUMNS = (
+    "width",
+    "height",
+    "natural_width",
+    "natural_height",
+    "rendered_width",
+    "rendered_height",
+    "file_size",
+)
+ASPECT_RATIO_TOLERANCE = 0.05  # relative difference between displayed and natural ratio
+OVERSIZE_TOLERANCE = 2.0  # natural pixels per displayed pixel, 2x covers retina screens
+
+
+def _number(value) -> float:
+    try:
+        return float(str(value).strip().removesuffix("px"))
+    except ValueError:
+        return np.nan
+
+
+def image_table(images) -> np.ndarray:
+    """
+    One row per image, one float column per IMAGE_COLUMNS entry, NaN when unknown.
+
+    Works with bs4 tags (attributes only) as well as the dicts from
+    get_image_properties, which also carry rendered/natural size and file size.
+    """
+    rows = []
+    for image in images:
+        natural = image.get("natural_size") or (None, None)
+        rendered = image.get("rendered_size") or (None, None)
+        rows.append((
+            _number(image.get("width")),
+            _number(image.get("height")),
+            _number(natural[0]),
+            _number(natural[1]),
+            _number(rendered[0]),
+            _number(rendered[1]),
+            _number(image.get("file_size")),
+        ))
+    return np.array(rows, dtype=float).reshape(-1, len(IMAGE_COLUMNS))
+
+
+def _stat(reduce, values):
+    values = values[~np.isnan(values)]
+    return round(float(reduce(values)), 3) if values.size else None
+
+
+def image_metrics(table: np.ndarray) -> dict:
+    """Per-image boolean/ratio arrays for the whole table at once."""
+    width, height, natural_w, natural_h, rendered_w, rendered_h, size = (
+        np.where(column > 0, column, np.nan) for column in table.T
+    )
+    natural_ratio = natural_w / natural_h
+    # Prefer the size the browser rendered, fall back to the declared attributes
+    shown_w = np.where(np.isnan(rendered_w), width, rendered_w)
+    shown_h = np.where(np.isnan(rendered_h), height, rendered_h)
+    ratio_error = np.abs(shown_w / shown_h - natural_ratio) / natural_ratio
+    oversize_ratio = np.fmax(natural_w / shown_w, natural_h / shown_h)
+    return {
+        "missing_dimensions": np.isnan(width) | np.isnan(height),
+        "ratio_error": ratio_error,
+        "aspect_ratio_mismatch": ratio_error > ASPECT_RATIO_TOLERANCE,
+        "oversize_ratio": oversize_ratio,
+        "oversized": oversize_ratio > OVERSIZE_TOLERANCE,
+        "file_size": size,
+    }
+
 
 def check_image_info(images):
+    """
+    Dimension, aspect-ratio, oversize, alt and byte checks over a page's images.
+
+    Only the dicts from get_image_properties (play_serv) carry natural size,
+    rendered size and file size; bs4 tags just have attributes, so on them the
+    aspect-ratio and oversize checks have nothing to flag.
+    """
     result = {
         "correct_dimensions": True,
         "correct_aspect_ratio": True,
@@ -7,24 +87,38 @@ def check_image_info(images):
         "required_alt_attribute": True,
         "image_details": [],
     }
+    audited = []
     for image in images:
-        image_details = {
-            "src": image.get("src", None),
-            "width": image.get("width", None),
-            "height": image.get("height", None),
-            "alt": image.get("alt", None),
-            "is_svg": image.get("src", "").endswith(".svg"),
-        }
-        if image_details["src"]:
-            if image_details["is_svg"]:
-                pass
-            else:
-                if not image_details["width"] or not image_details["height"]:
-                    result["correct_dimensions"] = False
-                if not image_details["alt"]:
-                    result["required_alt_attribute"] = False
-                result["image_details"].append(image_details)
+        src = image.get("src") or ""
+        # svg scales freely, so sizes and alt are only checked for raster images
+        if src and not src.endswith(".svg"):
+            audited.append(image)
+            result["image_details"].append({
+                "src": src,
+                "width": image.get("width", None),
+                "height": image.get("height", None),
+                "alt": image.get("alt", None),
+                "is_svg": False,
+            })
 
+    metrics = image_metrics(image_table(audited))
+    missing_alt = np.array([not details["alt"] for details in result["image_details"]], dtype=bool)
+    result["correct_dimensions"] = not metrics["missing_dimensions"].any()
+    result["correct_aspect_ratio"] = not metrics["aspect_ratio_mismatch"].any()
+    result["properly_sized"] = not metrics["oversized"].any()
+    result["required_alt_attribute"] = not missing_alt.any()
+    result["stats"] = {
+        "count": len(audited),
+        "missing_dimensions": int(metrics["missing_dimensions"].sum()),
+        "missing_alt": int(missing_alt.sum()),
+        "aspect_ratio_mismatches": int(metrics["aspect_ratio_mismatch"].sum()),
+        "mean_ratio_error": _stat(np.mean, metrics["ratio_error"]),
+        "oversized": int(metrics["oversized"].sum()),
+        "max_oversize_ratio": _stat(np.max, metrics["oversize_ratio"]),
+        "total_bytes": int(np.nansum(metrics["file_size"])),
+        "mean_bytes": _stat(np.mean, metrics["file_size"]),
+        "max_bytes": _stat(np.max, metrics["file_size"]),
+    }
     return result
 
 
@@ -51,30 +145,38 @@ def check_image_alt_attribute(image):
         return False
     return True
 
-async def get_image_properties(image_handle, page):
-    rendered_size = await image_handle.evaluate("el => [el.offsetWidth, el.offsetHeight]")
-    rendered_aspect_ratio = rendered_size[0] / rendered_size[1]
-
-    # Option 1: Using developer tools (might be less efficient)
-    intrinsic_size_and_ratio = await page.evaluate(
-        """
-        const el = document.querySelector("%s")
-        const computedStyle = window.getComputedStyle(el)
-        return [el.naturalWidth, el.naturalHeight, computedStyle.aspectRatio]
-        """ % image_handle.selector
-    )
-
-    # Option 2: Download and calculate file size (might not be optimal)
-    # image_data = await page.screenshot({clip: image_handle.bounding_box()})
-    # file_size = len(image_data)
+# One round trip for the whole page instead of several evaluate calls per <img>
+IMAGE_PROPERTIES_JS = """
+els => els.map(el => {
+    const style = window.getComputedStyle(el);
+    return {
+        src: el.getAttribute("src"),
+        current_source: el.currentSrc,
+        alt: el.getAttribute("alt"),
+        loading: el.getAttribute("loading"),
+        width: el.getAttribute("width"),
+        height: el.getAttribute("height"),
+        rendered_size: [el.offsetWidth, el.offsetHeight],
+        rendered_aspect_ratio: el.offsetHeight ? el.offsetWidth / el.offsetHeight : null,
+        natural_size: [el.naturalWidth, el.naturalHeight],
+        computed_aspect_ratio: style.aspectRatio,
+    };
+})
+"""
 
-    # Get current source
-    current_source = await image_handle.evaluate("el => el.src")
 
-    return {
-        "rendered_size": rendered_size,
-        "rendered_aspect_ratio": rendered_aspect_ratio,
-        "intrinsic_size_and_ratio": intrinsic_size_and_ratio,
-        "file_size": None,  # Replace with Option 2 if needed
-        "current_source": current_source,
-    }
+async def get_image_properties(page) -> list:
+    """
+    Rendered and natural size, aspect ratio, alt, loading and currentSrc of every <img>,
+    plus the byte size and sniffed format of the file it loaded.
+    """
+    images = await page.eval_on_selector_all("img", IMAGE_PROPERTIES_JS)
+    sources = [image["current_source"] or urljoin(page.url, image["src"] or "") for image in images]
+    for image, probe in zip(images, await image_weight.probe_images(sources)):
+        image["file_size"] = probe.get("file_size")
+        image["format"] = probe.get("format")
+        image["oversized"] = probe.get("oversized", False)
+        image["legacy_format"] = probe.get("legacy_format", False)
+        if probe.get("error"):
+            image["error"] = probe["error"]
+    return images
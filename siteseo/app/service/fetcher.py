@@ -0,0 +1,71 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+import httpx
+
+MAX_CONNECTIONS = int(os.getenv("SEO_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.getenv("SEO_MAX_KEEPALIVE", "20"))
+MAX_CONCURRENCY = int(os.getenv("SEO_MAX_CONCURRENCY", "50"))
+FETCH_TIMEOUT = float(os.getenv("SEO_FETCH_TIMEOUT", "15"))
+CONNECT_TIMEOUT = float(os.getenv("SEO_CONNECT_TIMEOUT", "5"))
+USER_AGENT = "ReachAI-SEO/1.0 (+https://horacelearning.us)"
+
+_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Shared client for every SEO check, so connections are kept alive per host."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE,
+                keepalive_expiry=30,
+            ),
+            timeout=httpx.Timeout(FETCH_TIMEOUT, connect=CONNECT_TIMEOUT),
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+        )
+    return _client
+
+
+def get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def fetch(url: str, method: str = "GET", **kwargs) -> httpx.Response:
+    """
+    Fetch a url over the pooled client.
+
+    At most MAX_CONCURRENCY requests are in flight per worker, the rest wait
+    their turn instead of opening more sockets.
+    """
+    async with get_semaphore():
+        return await get_client().request(method, url, **kwargs)
+
+
+@asynccontextmanager
+async def stream(url: str, method: str = "GET", **kwargs) -> AsyncIterator[httpx.Response]:
+    """
+    Open a response without reading the body.
+
+    Leaving the block early drops the rest of the download, which is what the
+    head-only checks rely on.
+    """
+    async with get_semaphore():
+        async with get_client().stream(method, url, **kwargs) as response:
+            yield response
+
+
+async def close():
+    global _client, _semaphore
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _semaphore = None
@@ -0,0 +1,88 @@
+import codecs
+from html.parser import HTMLParser
+from typing import AsyncIterator, Iterable
+
+ELEMENTS = ("title", "h1", "meta_description")
+
+
+class HeadScanner(HTMLParser):
+    """
+    Incremental tokenizer that only keeps <title>, <h1> and <meta name=description>.
+
+    Feed it text as it arrives and stop reading once `done` is true. Title and
+    meta description are settled when they are found or when the head closes,
+    h1 is settled by the first heading, so h1s holds the headings seen so far.
+    """
+
+    def __init__(self, wanted: Iterable[str] = ELEMENTS):
+        super().__init__(convert_charrefs=True)
+        self.wanted = set(wanted)
+        self.title = None
+        self.h1s = []
+        self.meta_description = None
+        self._settled = set()
+        self._capture = None
+        self._buffer = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title" and "title" not in self._settled:
+            self._capture, self._buffer = tag, []
+        elif tag == "h1":
+            self._capture, self._buffer = tag, []
+        elif tag == "meta" and "meta_description" not in self._settled:
+            attrs = dict(attrs)
+            if (attrs.get("name") or "").lower() == "description":
+                self.meta_description = attrs.get("content")
+                self._settled.add("meta_description")
+        elif tag == "body":
+            self._settled.update(("title", "meta_description"))
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self._settled.update(("title", "meta_description"))
+        if tag != self._capture:
+            return
+        text = "".join(self._buffer).strip()
+        if tag == "title":
+            self.title = text
+            self._settled.add("title")
+        else:
+            self.h1s.append(text)
+            self._settled.add("h1")
+        self._capture = None
+
+    def handle_data(self, data):
+        if self._capture:
+            self._buffer.append(data)
+
+    @property
+    def done(self) -> bool:
+        return self.wanted <= self._settled
+
+    def result(self) -> dict:
+        return {
+            "title": self.title,
+            "h1s": self.h1s,
+            "meta_description": self.meta_description,
+        }
+
+
+async def scan(
+    chunks: AsyncIterator[bytes],
+    encoding: str = None,
+    max_bytes: int = 512 * 1024,
+    wanted: Iterable[str] = ELEMENTS,
+) -> dict:
+    """Feed response chunks to a HeadScanner until it is done or max_bytes were read."""
+    scanner = HeadScanner(wanted)
+    try:
+        decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    read = 0
+    async for chunk in chunks:
+        read += len(chunk)
+        scanner.feed(decoder.decode(chunk))
+        if scanner.done or read >= max_bytes:
+            break
+    return scanner.result()
@@ -0,0 +1,117 @@
+import asyncio
+import os
+from typing import Iterable, List, Optional
+import httpx
+from siteseo.app.service import fetcher
+
+MAX_IMAGE_BYTES = int(os.getenv("SEO_MAX_IMAGE_BYTES", str(200 * 1024)))
+SNIFF_BYTES = 32
+# Raster formats that have a smaller modern equivalent (webp/avif)
+LEGACY_FORMATS = {"jpeg", "png", "gif", "bmp", "tiff"}
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """Image format from its first bytes."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"avif", b"avis"):
+        return "avif"
+    if head.startswith(b"BM"):
+        return "bmp"
+    if head[:4] in (b"II*\x00", b"MM\x00*"):
+        return "tiff"
+    if head[:4] == b"\x00\x00\x01\x00":
+        return "ico"
+    text = head.lstrip().lower()
+    if text.startswith(b"<svg") or text.startswith(b"<?xml"):
+        return "svg"
+    return None
+
+
+def _format_from_type(content_type: str) -> Optional[str]:
+    subtype = content_type.split(";")[0].strip().lower().rpartition("/")[2]
+    return {"svg+xml": "svg", "jpg": "jpeg", "x-icon": "ico"}.get(subtype, subtype or None)
+
+
+def _total_size(response: httpx.Response) -> Optional[int]:
+    content_range = response.headers.get("content-range", "")
+    total = content_range.rpartition("/")[2]
+    if total.isdigit():
+        return int(total)
+    length = response.headers.get("content-length")
+    if response.status_code == 200 and length and length.isdigit():
+        return int(length)
+    return None
+
+
+def _data_uri(url: str) -> dict:
+    header, _, data = url.partition(",")
+    size = len(data) * 3 // 4 if header.endswith(";base64") else len(data)
+    return {"src": url[:64], "file_size": size, "format": _format_from_type(header[5:])}
+
+
+def _flag(probe: dict, max_bytes: int) -> dict:
+    size = probe.get("file_size")
+    probe["oversized"] = size is not None and size > max_bytes
+    probe["legacy_format"] = probe.get("format") in LEGACY_FORMATS
+    return probe
+
+
+async def probe_image(url: str, max_bytes: int = MAX_IMAGE_BYTES) -> dict:
+    """
+    Byte size and real format of one image without downloading it.
+
+    A ranged GET returns the total size in Content-Range together with the
+    first bytes to sniff. Servers that ignore Range still send Content-Length,
+    and the stream is dropped after the first chunk.
+    """
+    if url.startswith("data:"):
+        return _flag(_data_uri(url), max_bytes)
+    try:
+        headers = {"Range": f"bytes=0-{SNIFF_BYTES - 1}"}
+        async with fetcher.stream(url, headers=headers) as response:
+            if response.status_code >= 400:
+                return {"src": url, "file_size": None, "format": None, "error": f"HTTP {response.status_code}"}
+            head = b""
+            async for chunk in response.aiter_bytes():
+                head += chunk
+                if len(head) >= SNIFF_BYTES:
+                    break
+            probe = {
+                "src": url,
+                "file_size": _total_size(response),
+                "format": sniff_format(head)
+                or _format_from_type(response.headers.get("content-type", "")),
+            }
+    except (httpx.HTTPError, httpx.InvalidURL, ValueError) as e:
+        # a src the page got wrong only fails that image, not the whole audit
+        return {"src": url, "file_size": None, "format": None, "error": str(e) or type(e).__name__}
+    return _flag(probe, max_bytes)
+
+
+async def probe_images(urls: Iterable[str], max_bytes: int = MAX_IMAGE_BYTES) -> List[dict]:
+    """probe_image for every url concurrently, each distinct url probed once. Results follow `urls`."""
+    urls = list(urls)
+    unique = list(dict.fromkeys(url for url in urls if url))
+    probes = await asyncio.gather(*(probe_image(url, max_bytes) for url in unique))
+    found = dict(zip(unique, probes))
+    return [found.get(url, {"src": url, "file_size": None, "format": None}) for url in urls]
+
+
+def summarize(probes: List[dict]) -> dict:
+    """Page image weight, counting every distinct image once."""
+    probes = list({probe["src"]: probe for probe in probes}.values())
+    sizes = [probe["file_size"] for probe in probes if probe.get("file_size") is not None]
+    return {
+        "total_bytes": sum(sizes),
+        "largest_bytes": max(sizes, default=0),
+        "oversized": [probe["src"] for probe in probes if probe.get("oversized")],
+        "legacy_format": [probe["src"] for probe in probes if probe.get("legacy_format")],
+        "failed": [probe["src"] for probe in probes if probe.get("error")],
+    }
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit
+import httpx
+from siteseo.app.service import fetcher, seo_serv
+from siteseo.app.service.crawler import normalize_url
+
+LINK_TIMEOUT = float(os.getenv("SEO_LINK_TIMEOUT", "8"))
+LINK_CACHE_TTL = float(os.getenv("SEO_LINK_CACHE_TTL", "600"))
+# timeouts, connection errors, 429 and 5xx may pass, so they are retried sooner
+LINK_ERROR_TTL = float(os.getenv("SEO_LINK_ERROR_TTL", "30"))
+LINK_CACHE_SIZE = int(os.getenv("SEO_LINK_CACHE_SIZE", "50000"))
+LINKS_PER_HOST = 4
+
+_cache: Dict[str, Tuple[float, dict]] = {}
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def _ttl(result: dict) -> float:
+    status = result["status"]
+    if status is None or status == 429 or status >= 500:
+        return LINK_ERROR_TTL
+    return LINK_CACHE_TTL
+
+
+async def _probe(url: str, key: str) -> dict:
+    """HEAD the link, falling back to a GET whose body is not read when HEAD is refused."""
+    result = {"url": url, "status": None, "redirects": 0, "final_url": url, "error": None}
+    try:
+        response = await fetcher.fetch(url, method="HEAD", timeout=LINK_TIMEOUT, follow_redirects=True)
+        if response.status_code in (403, 405, 501):
+            async with fetcher.stream(url, timeout=LINK_TIMEOUT, follow_redirects=True) as response:
+                pass
+        result.update(
+            status=response.status_code,
+            redirects=len(response.history),
+            final_url=str(response.url),
+        )
+        if response.status_code >= 400:
+            result["error"] = f"HTTP {response.status_code}"
+    except httpx.TimeoutException:
+        result["error"] = "timeout"
+    except (httpx.HTTPError, httpx.InvalidURL, ValueError) as e:
+        # an href httpx cannot request is a broken link of that page, not a failed audit
+        result["error"] = str(e) or type(e).__name__
+    if len(_cache) >= LINK_CACHE_SIZE:
+        del _cache[next(iter(_cache))]
+    _cache[key] = (time.monotonic() + _ttl(result), result)
+    return result
+
+
+async def check_link(url: str) -> dict:
+    """
+    Status of one absolute link, requested as written minus its fragment.
+
+    Results are cached under the link's normalized form for LINK_CACHE_TTL
+    seconds (LINK_ERROR_TTL for failures that may be transient), so links
+    shared by every page of a site (menus, footers) are probed once per site
+    audit, and concurrent checks of the same link share one request.
+    """
+    url = urldefrag(url)[0]
+    key = normalize_url(url) or url
+    hit = _cache.get(key)
+    if hit and hit[0] > time.monotonic():
+        return hit[1]
+    if key not in _inflight:
+        _inflight[key] = asyncio.ensure_future(_probe(url, key))
+        _inflight[key].add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(_inflight[key])
+
+
+async def check_links(hrefs: Iterable[str], base: str = None, per_host: int = LINKS_PER_HOST) -> dict:
+    """
+    Dedup `hrefs` by their normalized form, then probe them concurrently, at most `per_host` at a time per host.
+
+    The first href of each normalized form is requested as the page links it,
+    resolved against `base`. Links that are not http(s) (mailto:, tel:,
+    javascript:, bare fragments) are skipped.
+    """
+    urls, skipped = {}, 0
+    for href in hrefs:
+        key = normalize_url(href, base) if href else None
+        if key is None:
+            skipped += 1
+        else:
+            urls.setdefault(key, urldefrag(urljoin(base, href.strip()) if base else href.strip())[0])
+    host_slots = defaultdict(lambda: asyncio.Semaphore(per_host))
+
+    async def probe(url: str) -> dict:
+        async with host_slots[urlsplit(url).netloc]:
+            return await check_link(url)
+
+    results = await asyncio.gather(*(probe(url) for url in urls.values()))
+    broken = [r for r in results if r["status"] is not None and r["status"] >= 400]
+    return {
+        "checked": len(results),
+        "skipped": skipped,
+        "broken": broken,
+        "timeouts": [r["url"] for r in results if r["error"] == "timeout"],
+        "failed": [r for r in results if r["status"] is None and r["error"] != "timeout"],
+        "redirected": [r for r in results if r["redirects"] and r["status"] < 400],
+        "healthy": not broken and all(r["status"] is not None for r in results),
+        "links": results,
+    }
+
+
+async def page_link_health(url: str) -> dict:
+    """check_links over every <a href> of the page, reusing the audit's download of it."""
+    links = (await seo_serv.analyze(url, ["friendly"]))["friendly"]["link_details"]
+    return await check_links((link["href"] for link in links), base=url)
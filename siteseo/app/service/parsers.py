@@ -0,0 +1,25 @@
+import os
+from typing import List, Optional
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+# Fastest first. lxml is C-backed, html.parser is the pure-Python fallback that always exists.
+PARSERS = ("lxml", "html.parser")
+
+
+def available_parsers() -> List[str]:
+    return [name for name in PARSERS if builder_registry.lookup(name)]
+
+
+def default_parser() -> str:
+    """SEO_HTML_PARSER when it is installed, otherwise the fastest installed backend."""
+    wanted = os.getenv("SEO_HTML_PARSER")
+    if wanted and builder_registry.lookup(wanted):
+        return wanted
+    return available_parsers()[0]
+
+
+def make_soup(markup, parser: Optional[str] = None) -> BeautifulSoup:
+    if parser is None or not builder_registry.lookup(parser):
+        parser = default_parser()
+    return BeautifulSoup(markup, parser)
@@ -1,49 +1,29 @@
-from playwright.sync_api import sync_playwright
 from siteseo.app.service import es_imager
-def handle_friendly_url(url: str) -> dict:
+from siteseo.app.service import image_weight
+from siteseo.app.service import workers
+from siteseo.app.service.browser_pool import pool
+from siteseo.app.service.audit_cache import cache
+async def handle_friendly_url(url: str) -> dict:
     result = {}
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
-        images = page.query_selector_all("img")
-        image_info = es_imager.check_image_info(images)
-        result["images"] = image_info
+    async with pool.lease() as context:
+        page = await context.new_page()
+        await page.goto(url, wait_until="load")
+        images = await es_imager.get_image_properties(page)
+    # natural size, rendered size and file size are only known here, from the rendered page
+    result["images"] = await workers.run(es_imager.check_image_info, images)
     return result
 async def check_image(url: str) -> dict:
+    cached = await cache.revalidate(("images", url), url)
+    if cached is not None:
+        return cached
     result = {}
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
-
-        page.goto(url, wait_until="load")
-        images = page.query_selector_all("img")
-        image_info = []
-
-
-        for image in images:
-            rendered_size = await image.evaluate("el => [el.offsetWidth, el.offsetHeight]")
-            rendered_aspect_ratio = rendered_size[0] / rendered_size[1]  
-            intrinsic_aspect_ratio_and_size = await page.evaluate(
-                """
-const el = document.querySelector("%s")
-const computedStyles = window.getComputedStyle(el)
-return [el.naturalWidth, el.naturalHeight, computedStyle.aspectRatio]
-""" % image.selector
-            )
-            image_details = {
-                "src": image.get_attribute("src"),
-                "alt": image.get_attribute("alt"),
-                "width": image.get_attribute("width"),
-                "height": image.get_attribute("height"),
-                "intrinsic": intrinsic_aspect_ratio 
-            }
-            image_info.append(image_details)
-    
-
-        print(images)
-        result["images"] = image_info
+    async with pool.lease() as context:
+        page = await context.new_page()
+        response = await page.goto(url, wait_until="load")
+        result["images"] = await es_imager.get_image_properties(page)
+    result["info"] = await workers.run(es_imager.check_image_info, result["images"])
+    result["weight"] = image_weight.summarize(
+        [{**image, "src": image["current_source"] or image["src"]} for image in result["images"]]
+    )
+    cache.put(("images", url), result, response.headers if response else None)
     return result
-
-
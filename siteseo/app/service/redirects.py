@@ -0,0 +1,109 @@
+import asyncio
+import time
+from typing import AsyncIterator, Iterable, List, Optional
+from urllib.parse import urljoin, urlsplit
+import httpx
+from siteseo.app.service import fetcher
+
+MAX_HOPS = 10
+
+
+def _tls_version(response: httpx.Response) -> Optional[str]:
+    stream = response.extensions.get("network_stream")
+    try:
+        ssl_object = stream.get_extra_info("ssl_object") if stream else None
+    except Exception:
+        return None
+    return ssl_object.version() if ssl_object else None
+
+
+async def _hop(url: str) -> dict:
+    """
+    One request without following redirects.
+
+    HEAD keeps the pooled connection reusable without a body to drain; servers
+    that reject HEAD get a GET whose body is not read.
+    """
+    start = time.perf_counter()
+    response = await fetcher.fetch(url, method="HEAD", follow_redirects=False)
+    if response.status_code in (405, 501):
+        async with fetcher.stream(url, follow_redirects=False) as response:
+            pass
+    return {
+        "url": url,
+        "status": response.status_code,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        "http_version": response.http_version,
+        "tls_version": _tls_version(response),
+        "location": response.headers.get("location") if response.is_redirect else None,
+    }
+
+
+def _revisits(values: List[str]) -> bool:
+    """True when a value comes back after the chain had moved away from it."""
+    seen = []
+    for value in values:
+        if seen and value != seen[-1] and value in seen:
+            return True
+        seen.append(value)
+    return False
+
+
+async def trace(url: str, max_hops: int = MAX_HOPS) -> dict:
+    """
+    Follow every redirect of `url` and record status, latency and protocol per hop.
+
+    Stops on a loop (a url seen before) or after `max_hops` redirects;
+    too_many is only set when the last hop still redirects. ping_pong flags
+    chains that switch scheme or host back and forth, e.g.
+    http -> https -> http or apex -> www -> apex. A request that fails, or a
+    Location that is not a valid url, ends the chain with `error`.
+    """
+    hops, visited = [], set()
+    current, loop, too_many, error = url, False, False, None
+    while True:
+        try:
+            hop = await _hop(current)
+        except (httpx.HTTPError, httpx.InvalidURL, ValueError) as e:
+            error = str(e) or type(e).__name__
+            break
+        hops.append(hop)
+        visited.add(current)
+        if not hop["location"]:
+            break
+        if len(hops) > max_hops:  # max_hops redirects already followed
+            too_many = True
+            break
+        try:
+            current = urljoin(current, hop["location"])
+        except ValueError as e:
+            error = f"Invalid Location: {e}"
+            break
+        if current in visited:
+            loop = True
+            break
+
+    parts = [urlsplit(hop["url"]) for hop in hops]
+    return {
+        "url": url,
+        "final_url": hops[-1]["url"] if hops else url,
+        "final_status": hops[-1]["status"] if hops else None,
+        "redirects": sum(1 for hop in hops if hop["location"]),
+        "loop": loop,
+        "too_many": too_many,
+        "ping_pong": _revisits([p.scheme for p in parts]) or _revisits([p.hostname or "" for p in parts]),
+        "hops": hops,
+        "error": error,
+    }
+
+
+async def trace_many(urls: Iterable[str], concurrency: int = 50) -> AsyncIterator[dict]:
+    """trace every url, yielding each chain as it completes."""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def run(url: str) -> dict:
+        async with slots:
+            return await trace(url)
+
+    for chain in asyncio.as_completed([run(url) for url in dict.fromkeys(urls)]):
+        yield await chain
@@ -1,33 +1,38 @@
-import requests
+import os
 from selenium.webdriver.firefox.options import Options
 from bs4 import BeautifulSoup
-
-def test_blessed(url):
+from siteseo.app.service import fetcher
+from siteseo.app.service import es_imager
+from siteseo.app.service import dom_weight
+from siteseo.app.service import social_meta
+from siteseo.app.service import parsers
+from siteseo.app.service import head_scanner
+from siteseo.app.service import workers
+from siteseo.app.service.audit_cache import cache
+
+HEAD_SCAN_BYTES = int(os.getenv("SEO_HEAD_SCAN_BYTES", str(512 * 1024)))
+
+async def test_blessed(url):
     #url = input("https://myessl.com") # e.g. https://mblessed.vercel.app
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    print(response.text)
+    report = await analyze(url, ["styles", "dom"])
+    styles, dom = report["styles"], report["dom"]
 
 # Find and list all <style> tags and style attributes in other tags
-    style_tags = soup.find_all('style')
-    inline_styles = soup.find_all(style=True)
-
     print("Style Tags:")
-    for tag in style_tags:
+    for tag in styles["style_tags"]:
         print(tag)
 
     print("\nInline Styles:")
-    for tag in inline_styles:
-        print(f'{tag.name}[style] = {tag["style"]}')
+    for tag in styles["inline_styles"]:
+        print(f'{tag["tag"]}[style] = {tag["style"]}')
 
-def get_page_info(url):
-    result_dict = {}
-    response = requests.get(url)
-    response.raise_for_status()  # Raise an exception for non-200 status codes
+    print(f'\nInline style bytes: {dom["inline_style_bytes"]}')
+    print(f'Inline script bytes: {dom["inline_script_bytes"]}')
 
-    soup = BeautifulSoup(response.content, "html.parser")
+def page_info(soup: BeautifulSoup) -> dict:
+    result_dict = {}
 
-    result_dict["title"] = soup.title.text.strip()
+    result_dict["title"] = soup.title.text.strip() if soup.title else None
 
     headings = soup.find_all("h1")
     result_dict["h1s"] = [heading.text.strip() for heading in headings]
@@ -37,12 +42,7 @@ def get_page_info(url):
 
     return result_dict
 
-def handle_friendly_url(url: str) -> dict:
-    response = requests.get(url)
-    response.raise_for_status()  # Raise an exception for non-200 status codes
-
-    soup = BeautifulSoup(response.content, "html.parser")
-
+def friendly_links(soup: BeautifulSoup) -> dict:
     non_friendly = {"friendly": True, "link_details": []}
 
     for link in soup.find_all("a"):
@@ -78,6 +78,79 @@ def handle_friendly_url(url: str) -> dict:
 
     return non_friendly
 
+def inline_styles(soup: BeautifulSoup) -> dict:
+    return {
+        "style_tags": [str(tag) for tag in soup.find_all("style")],
+        "inline_styles": [
+            {"tag": tag.name, "style": tag["style"]} for tag in soup.find_all(style=True)
+        ],
+    }
+
+def image_info(soup: BeautifulSoup) -> dict:
+    return es_imager.check_image_info(soup.find_all("img"))
+
+# Every check takes the parsed page and returns its own section of the report
+CHECKS = {
+    "info": page_info,
+    "friendly": friendly_links,
+    "styles": inline_styles,
+    "images": image_info,
+    "dom": dom_weight.dom_weight,
+    "socials": social_meta.social_tags,
+}
+
+def check_soup(soup: BeautifulSoup, checks=None) -> dict:
+    return {name: CHECKS[name](soup) for name in checks or CHECKS}
+
+def run_checks(content: bytes, checks=None, parser=None) -> dict:
+    """Parse the page once and run each requested check over the same tree."""
+    return check_soup(parsers.make_soup(content, parser), checks)
+
+async def analyze(url: str, checks=None) -> dict:
+    """
+    Download a page once and return the combined report of the requested checks.
+
+    Reports are cached; a stale one is revalidated with a conditional GET and
+    reused when the server answers 304 Not Modified.
+    """
+    unknown = set(checks or ()) - set(CHECKS)
+    if unknown:
+        raise ValueError(f"Unknown checks: {', '.join(sorted(unknown))}")
+    key = ("analyze", url, tuple(checks or CHECKS))
+    entry = cache.get(key)
+    if entry and cache.is_fresh(entry):
+        return dict(entry.report)
+
+    response = await fetcher.fetch(url, headers=entry.validators() if entry else None)
+    if entry and response.status_code == 304:
+        cache.touch(entry)
+        return dict(entry.report)
+    response.raise_for_status()  # Raise an exception for non-200 status codes
+    report = await workers.run(run_checks, response.content, checks)
+    cache.put(key, report, response.headers)
+    return dict(report)
+
+async def scan_page_info(url: str, max_bytes: int = HEAD_SCAN_BYTES) -> dict:
+    """page_info from a streamed download that stops as soon as title, h1 and meta are known."""
+    async with fetcher.stream(url) as response:
+        response.raise_for_status()
+        return await head_scanner.scan(
+            response.aiter_bytes(16384), response.charset_encoding, max_bytes
+        )
+
+async def get_page_info(url, stream: bool = False):
+    if stream:
+        return await scan_page_info(url)
+    return (await analyze(url, ["info"]))["info"]
+
+async def handle_friendly_url(url: str) -> dict:
+    return (await analyze(url, ["friendly"]))["friendly"]
+
+async def social_preview(url: str) -> dict:
+    """Social metadata of the page, with its preview images checked concurrently."""
+    socials = (await analyze(url, ["socials"]))["socials"]
+    return await social_meta.validate_images(url, socials)
+
 def image_check(url: str) -> dict:
     pass
     # response = requests.get(url)
@@ -0,0 +1,101 @@
+import json
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup, Tag
+from siteseo.app.service import image_weight
+
+OPEN_GRAPH_REQUIRED = ("og:title", "og:type", "og:image", "og:url")
+IMAGE_PROPERTIES = ("og:image", "og:image:url", "og:image:secure_url", "twitter:image", "twitter:image:src")
+# Where a microdata property keeps its value, by tag
+ITEMPROP_ATTRIBUTES = {
+    "meta": "content", "link": "href", "a": "href", "area": "href", "img": "src",
+    "audio": "src", "video": "src", "source": "src", "iframe": "src", "embed": "src",
+    "object": "data", "time": "datetime", "data": "value", "meter": "value",
+}
+
+
+def _itemprop_value(tag: Tag):
+    attribute = ITEMPROP_ATTRIBUTES.get(tag.name)
+    if attribute and tag.has_attr(attribute):
+        return tag[attribute]
+    return tag.get_text(" ", strip=True)
+
+
+def _json_ld_types(data) -> list:
+    """@type of every node, including the ones inside @graph."""
+    nodes = data if isinstance(data, list) else [data]
+    types = []
+    for node in nodes:
+        if not isinstance(node, dict):
+            continue
+        kind = node.get("@type")
+        types += kind if isinstance(kind, list) else [kind] if kind else []
+        types += _json_ld_types(node.get("@graph", []))
+    return types
+
+
+def social_tags(soup: BeautifulSoup) -> dict:
+    """
+    Open Graph, Twitter card, JSON-LD and microdata of the parsed page.
+
+    One walk over the tree collects all four. Microdata properties belong to
+    their nearest itemscope; a nested itemscope becomes the property's value.
+    """
+    open_graph, twitter, images = {}, {}, []
+    json_ld, json_ld_errors = [], []
+    items = []
+
+    stack = [(child, None) for child in reversed(soup.contents) if isinstance(child, Tag)]
+    while stack:
+        tag, item = stack.pop()
+        scope = item
+        if tag.has_attr("itemscope"):
+            scope = {"type": tag.get("itemtype"), "properties": {}}
+            if item is None or not tag.has_attr("itemprop"):
+                items.append(scope)
+        if item is not None and tag.has_attr("itemprop"):
+            value = scope if scope is not item else _itemprop_value(tag)
+            for name in tag["itemprop"].split():
+                item["properties"].setdefault(name, []).append(value)
+
+        if tag.name == "meta":
+            key = (tag.get("property") or tag.get("name") or "").strip().lower()
+            content = tag.get("content")
+            if content is not None:
+                if key.startswith("og:"):
+                    open_graph.setdefault(key, content)
+                elif key.startswith("twitter:"):
+                    twitter.setdefault(key, content)
+                if key in IMAGE_PROPERTIES and content.strip():
+                    images.append(content.strip())
+        elif tag.name == "script" and tag.get("type", "").strip().lower() == "application/ld+json":
+            try:
+                json_ld.append(json.loads(tag.get_text()))
+            except ValueError as e:
+                json_ld_errors.append(str(e))
+            continue
+
+        stack.extend((child, scope) for child in reversed(tag.contents) if isinstance(child, Tag))
+
+    missing = [key for key in OPEN_GRAPH_REQUIRED if key not in open_graph]
+    # Twitter falls back to og:title / og:description / og:image, but the card type has no fallback
+    if "twitter:card" not in twitter:
+        missing.append("twitter:card")
+    return {
+        "open_graph": open_graph,
+        "twitter": twitter,
+        "json_ld": json_ld,
+        "json_ld_types": [t for data in json_ld for t in _json_ld_types(data)],
+        "json_ld_errors": json_ld_errors,
+        "microdata": items,
+        "images": list(dict.fromkeys(images)),
+        "missing": missing,
+    }
+
+
+async def validate_images(url: str, socials: dict) -> dict:
+    """Resolve the preview image urls against the page and probe them concurrently."""
+    sources = [urljoin(url, src) for src in socials["images"]]
+    probes = await image_weight.probe_images(sources)
+    for probe in probes:
+        probe["valid"] = not probe.get("error") and probe.get("format") is not None
+    return {**socials, "images": probes}
@@ -0,0 +1,220 @@
+import asyncio
+import datetime
+import os
+import ssl
+import time
+import warnings
+from collections import OrderedDict
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from cryptography import x509
+from cryptography.x509.oid import ExtensionOID, NameOID
+
+TLS_TIMEOUT = float(os.getenv("SEO_TLS_TIMEOUT", "5"))
+TLS_CACHE_TTL = float(os.getenv("SEO_TLS_CACHE_TTL", "3600"))
+TLS_CACHE_SIZE = int(os.getenv("SEO_TLS_CACHE_SIZE", "10000"))
+EXPIRY_WARNING_DAYS = 30
+PROTOCOLS = {
+    "TLSv1": ssl.TLSVersion.TLSv1,
+    "TLSv1.1": ssl.TLSVersion.TLSv1_1,
+    "TLSv1.2": ssl.TLSVersion.TLSv1_2,
+    "TLSv1.3": ssl.TLSVersion.TLSv1_3,
+}
+DEPRECATED_PROTOCOLS = ("TLSv1", "TLSv1.1")
+
+_handshakes: "OrderedDict[Tuple[str, int, Optional[str]], Tuple[float, dict]]" = OrderedDict()
+
+
+def to_host(url: str) -> Tuple[str, int]:
+    parts = urlsplit(url if "//" in url else f"//{url}")
+    return (parts.hostname or "").lower(), parts.port or 443
+
+
+def _unverified_context() -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+async def _connect(host: str, port: int, context: ssl.SSLContext, request_head: bool = False) -> dict:
+    """Handshake, optionally send a HEAD / over the same connection, and close."""
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port, ssl=context, server_hostname=host), TLS_TIMEOUT
+    )
+    try:
+        ssl_object = writer.get_extra_info("ssl_object")
+        result = {
+            "version": ssl_object.version(),
+            "cipher": ssl_object.cipher()[0],
+            "der": ssl_object.getpeercert(binary_form=True),
+            "headers": None,
+        }
+        if request_head:
+            writer.write(f"HEAD / HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+            try:
+                await writer.drain()
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), TLS_TIMEOUT)
+                result["headers"] = _parse_headers(head)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                pass  # not an HTTP server, the handshake result still stands
+        return result
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ssl.SSLError, ConnectionError):
+            pass
+
+
+def _parse_headers(head: bytes) -> dict:
+    headers = {}
+    for line in head.decode("latin-1").split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _hsts(headers: Optional[dict]) -> dict:
+    value = (headers or {}).get("strict-transport-security")
+    if not value:
+        return {"enabled": False, "header": None}
+    directives = [d.strip().lower() for d in value.split(";")]
+    max_age = next((d.split("=", 1)[1].strip('" ') for d in directives if d.startswith("max-age=")), "0")
+    return {
+        "enabled": True,
+        "header": value,
+        "max_age": int(max_age) if max_age.isdigit() else 0,
+        "include_subdomains": "includesubdomains" in directives,
+        "preload": "preload" in directives,
+    }
+
+
+def _covers(name: str, sans: List[str]) -> bool:
+    for san in sans:
+        san = san.lower()
+        if san == name:
+            return True
+        if san.startswith("*.") and name.count(".") == san.count(".") and name.endswith(san[1:]):
+            return True
+    return False
+
+
+def _certificate(der: bytes, host: str) -> dict:
+    cert = x509.load_der_x509_certificate(der)
+    try:
+        sans = cert.extensions.get_extension_for_oid(
+            ExtensionOID.SUBJECT_ALTERNATIVE_NAME
+        ).value.get_values_for_type(x509.DNSName)
+    except x509.ExtensionNotFound:
+        sans = []
+    not_after = cert.not_valid_after_utc
+    days_left = (not_after - datetime.datetime.now(datetime.timezone.utc)).days
+    apex = host.removeprefix("www.")
+
+    def common_name(name: x509.Name) -> Optional[str]:
+        attrs = name.get_attributes_for_oid(NameOID.COMMON_NAME)
+        return attrs[0].value if attrs else None
+
+    return {
+        "subject": common_name(cert.subject),
+        "issuer": common_name(cert.issuer),
+        "self_signed": cert.issuer == cert.subject,
+        "not_before": cert.not_valid_before_utc.isoformat(),
+        "not_after": not_after.isoformat(),
+        "days_left": days_left,
+        "expired": days_left < 0,
+        "expiring_soon": 0 <= days_left < EXPIRY_WARNING_DAYS,
+        "san": sans,
+        "covers_apex": _covers(apex, sans),
+        "covers_www": _covers(f"www.{apex}", sans),
+    }
+
+
+async def _protocol(host: str, port: int, version: ssl.TLSVersion) -> Optional[bool]:
+    """Whether the server accepts exactly this version, None when it cannot be offered from here."""
+    context = _unverified_context()
+    try:
+        with warnings.catch_warnings():
+            # probing for deprecated versions is the point here
+            warnings.simplefilter("ignore", DeprecationWarning)
+            context.minimum_version = context.maximum_version = version
+        if version < ssl.TLSVersion.TLSv1_2:
+            context.set_ciphers("DEFAULT:@SECLEVEL=0")
+    except (ValueError, ssl.SSLError):
+        return None
+    try:
+        await _connect(host, port, context)
+        return True
+    except ssl.SSLError as e:
+        # the local OpenSSL build or policy refuses to offer this version at all
+        if "NO_PROTOCOLS_AVAILABLE" in str(e):
+            return None
+        return False
+    except (OSError, asyncio.TimeoutError):
+        return False
+
+
+async def scan_host(host: str, port: int = 443, cafile: str = None) -> dict:
+    """
+    Certificate chain, expiry, SAN coverage, protocol versions and HSTS of one host.
+
+    Results are cached per (host, port, cafile) for TLS_CACHE_TTL seconds,
+    keeping the TLS_CACHE_SIZE most recently used hosts.
+    `cafile` lets tests and private deployments trust their own CA.
+    """
+    key = (host, port, cafile)
+    hit = _handshakes.get(key)
+    if hit and hit[0] > time.monotonic():
+        _handshakes.move_to_end(key)
+        return hit[1]
+    _handshakes.pop(key, None)
+
+    report = {"host": host, "port": port, "chain_valid": False, "verify_error": None}
+    protocols = asyncio.gather(*(_protocol(host, port, version) for version in PROTOCOLS.values()))
+    try:
+        try:
+            handshake = await _connect(host, port, ssl.create_default_context(cafile=cafile), True)
+            report["chain_valid"] = True
+        except ssl.SSLCertVerificationError as e:
+            report["verify_error"] = e.verify_message
+            handshake = await _connect(host, port, _unverified_context(), True)
+    except (OSError, asyncio.TimeoutError) as e:
+        protocols.cancel()
+        report["error"] = str(e) or type(e).__name__
+        return report
+
+    report["protocol"] = handshake["version"]
+    report["cipher"] = handshake["cipher"]
+    try:
+        report["certificate"] = _certificate(handshake["der"], host)
+    except ValueError as e:
+        # a certificate cryptography cannot parse fails this host only
+        protocols.cancel()
+        report["error"] = f"Invalid certificate: {e}"
+        return report
+    report["hsts"] = _hsts(handshake["headers"])
+    report["protocols"] = dict(zip(PROTOCOLS, await protocols))
+    report["deprecated_protocols"] = [
+        name for name in DEPRECATED_PROTOCOLS if report["protocols"][name]
+    ]
+    _handshakes[key] = (time.monotonic() + TLS_CACHE_TTL, report)
+    while len(_handshakes) > TLS_CACHE_SIZE:
+        _handshakes.popitem(last=False)
+    return report
+
+
+async def scan_many(urls: Iterable[str], concurrency: int = 50) -> AsyncIterator[dict]:
+    """scan_host over many sites, yielding each report as it completes."""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def scan(url: str) -> dict:
+        async with slots:
+            try:
+                return await scan_host(*to_host(url))
+            except Exception as e:
+                return {"url": url, "error": str(e) or type(e).__name__}
+
+    for report in asyncio.as_completed([scan(url) for url in dict.fromkeys(urls)]):
+        yield await report
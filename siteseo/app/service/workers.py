@@ -0,0 +1,52 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+# 0 keeps parsing on the event loop, which suits a single small worker or tests
+ANALYSIS_WORKERS = int(os.getenv("SEO_ANALYSIS_WORKERS", "0"))
+
+T = TypeVar("T")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Shared process pool for CPU-bound analysis, None when SEO_ANALYSIS_WORKERS is 0.
+
+    The server process runs threads (the executor's, the import jobs'), and a
+    forked child can inherit a lock one of them held, so workers are spawned.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None and ANALYSIS_WORKERS > 0:
+            _pool = ProcessPoolExecutor(
+                max_workers=ANALYSIS_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+async def run(fn: Callable[..., T], *args) -> T:
+    """
+    Call fn(*args) in the analysis pool and await the result.
+
+    `fn` must be a module-level function and its arguments and result must
+    pickle, so callers pass raw page bytes in and get a plain dict back rather
+    than a BeautifulSoup tree. Without a pool it runs inline.
+    """
+    pool = get_pool()
+    if pool is None:
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+
+def close():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
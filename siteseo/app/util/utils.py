@@ -1,7 +1,7 @@
-from bs4 import BeautifulSoup
 import requests
+from siteseo.app.service import parsers
 def is_javascript(html_content: str) -> bool:
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = parsers.make_soup(html_content)
     return soup.find(id='js-loaded')
 def get_geolocation():
     # Use a geolocation service to determine the approximate location
@@ -0,0 +1,79 @@
+"""
+Compare the html parser backends used by seo_serv on a corpus of saved pages.
+
+    python -m siteseo.bench.bench_parsers path/to/pages [--repeat 5]
+
+Every *.html file under the directory is parsed with each installed backend
+and run through all seo_serv checks. Without a directory a synthetic
+marketing page is used. Reports mean time per page and peak traced memory.
+"""
+import argparse
+import pathlib
+import statistics
+import time
+import tracemalloc
+from siteseo.app.service import parsers, seo_serv
+
+
+def synthetic_page(sections: int = 400) -> bytes:
+    body = "".join(
+        f'<section id="s{i}" style="padding:{i % 9}px"><h2>Section {i}</h2>'
+        f'<p>{"Lorem ipsum dolor sit amet. " * 20}</p>'
+        f'<a href="/page/{i}" title="Page {i}">read more</a>'
+        f'<img src="/img/{i}.jpg" alt="image {i}" width="300" height="200"></section>'
+        for i in range(sections)
+    )
+    return (
+        '<!doctype html><html><head><title>Benchmark page</title>'
+        '<meta name="description" content="synthetic"><style>body{margin:0}</style></head>'
+        f"<body><h1>Benchmark</h1>{body}</body></html>"
+    ).encode()
+
+
+def load_corpus(directory: str = None) -> dict:
+    if not directory:
+        return {"synthetic.html": synthetic_page()}
+    return {
+        str(path): path.read_bytes()
+        for path in sorted(pathlib.Path(directory).rglob("*.html"))
+    }
+
+
+def bench(corpus: dict, parser: str, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        for content in corpus.values():
+            start = time.perf_counter()
+            seo_serv.run_checks(content, parser=parser)
+            timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    for content in corpus.values():
+        seo_serv.run_checks(content, parser=parser)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "parser": parser,
+        "mean_ms": statistics.mean(timings) * 1000,
+        "p95_ms": sorted(timings)[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+        "peak_mb": peak / 2**20,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("corpus", nargs="?", help="directory of saved .html pages")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    total = sum(len(content) for content in corpus.values())
+    print(f"{len(corpus)} pages, {total / 2**20:.1f} MB")
+    print(f"{'parser':<12}{'mean ms':>10}{'p95 ms':>10}{'peak MB':>10}")
+    for parser in parsers.available_parsers():
+        row = bench(corpus, parser, args.repeat)
+        print(f"{row['parser']:<12}{row['mean_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['peak_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
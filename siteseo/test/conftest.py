@@ -1,7 +1,21 @@
 import pytest
+import httpx
+from siteseo.app.service import fetcher
+from siteseo.app.service.audit_cache import cache
 
 @pytest.fixture(scope="class")
 def setup():
     print("I come first")
     yield
-    print("finally do this")
\ No newline at end of file
+    print("finally do this")
+
+@pytest.fixture
+def mock_fetcher(monkeypatch):
+    """Point the pooled fetcher client at a handler(request) -> httpx.Response."""
+    def install(handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(fetcher, "_client", client)
+        monkeypatch.setattr(fetcher, "_semaphore", None)
+        cache.clear()
+        return fetcher
+    return install
@@ -0,0 +1,98 @@
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from siteseo.app.db.models import AuditRun, PageAudit
+from siteseo.app.service import audit_store
+
+PAGES = {
+    "/same": b"<html><head><title>Same</title></head><body><h1>S</h1></body></html>",
+    "/tagged": b"<html><head><title>Tagged</title></head><body><h1>T</h1></body></html>",
+    "/edited": b"<html><head><title>Old</title></head><body><h1>E</h1></body></html>",
+}
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    AuditRun.__table__.create(engine)
+    PageAudit.__table__.create(engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(audit_store, "SessionLocal", factory)
+    return factory
+
+
+@pytest.fixture
+def site(mock_fetcher):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.path == "/tagged":
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, content=PAGES["/tagged"], headers={"ETag": '"v1"'})
+        if request.url.path in PAGES:
+            return httpx.Response(200, content=PAGES[request.url.path])
+        return httpx.Response(404)
+
+    mock_fetcher(handler)
+    return requests
+
+
+async def collect(urls):
+    return [line async for line in audit_store.reaudit("site.test", urls, ["info"])]
+
+
+@pytest.mark.asyncio
+async def test_audit_page_reuses_unchanged_pages(site):
+    fresh = await audit_store.audit_page("http://site.test/same", ["info"])
+    assert fresh["report"]["info"]["title"] == "Same"
+
+    same = await audit_store.audit_page("http://site.test/same", ["info"], (7, fresh["content_hash"], None, None))
+    assert same["reused_from"] == 7 and "report" not in same
+
+    tagged = await audit_store.audit_page("http://site.test/tagged", ["info"], (8, "old-hash", '"v1"', None))
+    assert tagged["reused_from"] == 8 and tagged["content_hash"] == "old-hash" and tagged["etag"] == '"v1"'
+    assert site[-1].headers["if-none-match"] == '"v1"'
+
+    missing = await audit_store.audit_page("http://site.test/gone", ["info"])
+    assert missing["error"] == "HTTP 404"
+
+
+@pytest.mark.asyncio
+async def test_reaudit_references_reports_and_diffs_runs(site, sessions, monkeypatch):
+    urls = ["http://site.test/same", "http://site.test/tagged", "http://site.test/edited", "http://site.test/gone"]
+    first = await collect(urls)
+    assert first[-1]["run"]["previous_run"] is None and first[-1]["run"]["reanalyzed"] == 3
+
+    monkeypatch.setitem(PAGES, "/edited", b"<html><head><title>New</title></head><body><h1>E</h1></body></html>")
+    second = await collect(urls[:3] + ["http://site.test/added"])
+    summary = second[-1]["run"]
+    assert summary["previous_run"] == first[-1]["run"]["id"] and summary["reanalyzed"] == 1
+    lines = {line["url"]: line for line in second[:-1]}
+    assert lines["http://site.test/same"]["reused"] and lines["http://site.test/same"]["info"]["title"] == "Same"
+    assert not lines["http://site.test/edited"]["reused"] and lines["http://site.test/edited"]["info"]["title"] == "New"
+
+    db = sessions()
+    reused = db.query(PageAudit).filter(PageAudit.run_id == summary["id"], PageAudit.reused.is_(True)).all()
+    assert len(reused) == 2 and all(page.report is None and page.source_id for page in reused)
+    run = db.get(AuditRun, summary["id"])
+    assert run.started_at <= run.finished_at
+
+    # a third run points at the row of the first run, not at the reference in the second
+    original = db.query(PageAudit.id).filter(
+        PageAudit.run_id == first[-1]["run"]["id"], PageAudit.url == urls[0]
+    ).scalar()
+    third = await collect(urls[:1])
+    assert third[0]["info"]["title"] == "Same"
+    row = db.query(PageAudit).filter(PageAudit.run_id == third[-1]["run"]["id"]).one()
+    assert row.source_id == original
+
+    diff = audit_store.diff_runs(db, first[-1]["run"]["id"], summary["id"])
+    assert diff["added"] == ["http://site.test/added"]
+    assert diff["removed"] == ["http://site.test/gone"]
+    assert diff["changed"] == {"http://site.test/edited": ["info"]}
+    assert diff["unchanged"] == 2
+    db.close()
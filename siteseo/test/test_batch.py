@@ -0,0 +1,74 @@
+import asyncio
+import json
+import httpx
+import pytest
+from siteseo.app.service import batch_serv
+
+INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<sitemap><loc>http://fast.test/pages.xml</loc></sitemap>
+</sitemapindex>"""
+PAGES = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<url><loc>http://fast.test/a</loc></url>
+<url><loc>http://fast.test/b</loc></url>
+</urlset>"""
+PAGE = b"<html><head><title>T</title></head><body><h1>H</h1></body></html>"
+
+
+async def handler(request):
+    if request.url.path == "/sitemap.xml":
+        return httpx.Response(200, content=INDEX)
+    if request.url.path == "/pages.xml":
+        return httpx.Response(200, content=PAGES)
+    if request.url.host == "slow.test":
+        await asyncio.sleep(5)
+    return httpx.Response(200, content=PAGE)
+
+
+@pytest.mark.asyncio
+async def test_sitemap_index_is_followed(mock_fetcher):
+    mock_fetcher(handler)
+    urls = await batch_serv.sitemap_urls("http://fast.test/sitemap.xml")
+    assert urls == ["http://fast.test/a", "http://fast.test/b"]
+
+
+@pytest.mark.asyncio
+async def test_deadline_reports_unfinished_pages(mock_fetcher):
+    mock_fetcher(handler)
+    urls = ["http://slow.test/", "http://fast.test/a", "http://fast.test/a"]
+    lines = [
+        json.loads(line)
+        async for line in batch_serv.ndjson(batch_serv.audit_urls(urls, deadline=0.5))
+    ]
+    assert lines[0] == {"url": "http://fast.test/a", "info": {"title": "T", "h1s": ["H"], "meta_description": None}}
+    assert lines[1] == {"url": "http://slow.test/", "error": "deadline exceeded"}
+
+
+LOOP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<sitemap><loc>http://loop.test/sitemap.xml</loc></sitemap>
+<sitemap><loc>http://loop.test/one.xml</loc></sitemap>
+<sitemap><loc>http://loop.test/two.xml</loc></sitemap>
+</sitemapindex>"""
+
+
+@pytest.mark.asyncio
+async def test_sitemap_index_stops_at_limit_and_never_loops(mock_fetcher):
+    fetched = []
+
+    async def loop_handler(request):
+        fetched.append(request.url.path)
+        if request.url.path == "/sitemap.xml":
+            return httpx.Response(200, content=LOOP)
+        if request.url.path == "/slow.xml":
+            await asyncio.sleep(5)
+        return httpx.Response(200, content=PAGES)
+
+    mock_fetcher(loop_handler)
+    urls = await batch_serv.sitemap_urls("http://loop.test/sitemap.xml", limit=2)
+    assert urls == ["http://fast.test/a", "http://fast.test/b"]
+    assert fetched == ["/sitemap.xml", "/one.xml"]
+
+    with pytest.raises(asyncio.TimeoutError):
+        await batch_serv.sitemap_urls("http://loop.test/slow.xml", deadline=0.2)
@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from siteseo.app.service.browser_pool import BrowserPool, PooledBrowser
+
+
+class FakeContext:
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    launched = 0
+
+    def __init__(self):
+        FakeBrowser.launched += 1
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self):
+        return FakeContext()
+
+    async def close(self):
+        self.connected = False
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    async def launch(self):
+        return PooledBrowser(FakeBrowser())
+
+    monkeypatch.setattr(BrowserPool, "_launch", launch)
+    FakeBrowser.launched = 0
+    pool = BrowserPool(size=1, max_pages=2)
+
+    async def start():
+        pool._idle = asyncio.Queue()
+        pool._idle.put_nowait(await pool._launch())
+
+    pool.start = start
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_browser_is_recycled_after_max_pages(fake_pool):
+    for _ in range(5):
+        async with fake_pool.lease():
+            pass
+    # one launch at start, then a relaunch every max_pages leases
+    assert FakeBrowser.launched == 3
+
+
+@pytest.mark.asyncio
+async def test_crashed_browser_is_relaunched(fake_pool):
+    async with fake_pool.lease():
+        pass
+    crashed = fake_pool._idle.get_nowait()
+    crashed.browser.connected = False
+    fake_pool._idle.put_nowait(crashed)
+    async with fake_pool.lease():
+        pass
+    assert fake_pool._idle.get_nowait().browser.is_connected()
+    assert FakeBrowser.launched == 2
+
+
+@pytest.mark.asyncio
+async def test_close_also_closes_leased_browsers(fake_pool):
+    class FakePlaywright:
+        async def stop(self):
+            pass
+
+    fake_pool._playwright = FakePlaywright()
+    async with fake_pool.lease():
+        leased = next(iter(fake_pool._leased))
+        await fake_pool.close()
+        assert not leased.browser.is_connected()
+    assert fake_pool._idle is None and not fake_pool._leased
+
+
+@pytest.mark.asyncio
+async def test_failed_launch_is_raised_on_lease(monkeypatch):
+    stopped = []
+
+    class FakePlaywright:
+        chromium = None
+
+        async def stop(self):
+            stopped.append(True)
+
+    class Starter:
+        async def start(self):
+            return FakePlaywright()
+
+    async def launch(self):
+        raise RuntimeError("Executable doesn't exist")
+
+    monkeypatch.setattr("siteseo.app.service.browser_pool.async_playwright", lambda: Starter())
+    monkeypatch.setattr(BrowserPool, "_launch", launch)
+    pool = BrowserPool(size=1)
+    with pytest.raises(RuntimeError):
+        async with pool.lease():
+            pass
+    assert stopped and pool._idle is None and pool._playwright is None
@@ -0,0 +1,124 @@
+import httpx
+import pytest
+from siteseo.app.service import crawler
+
+ROBOTS = b"User-agent: *\nDisallow: /private\n"
+SITE = {
+    "/": b'<html><head><title>Home</title></head><body>'
+         b'<a href="/a#top">A</a><a href="/a?utm_source=x">A again</a><a href="/b">B</a>'
+         b'<a href="/private/x">P</a><a href="http://other.test/">Out</a><a href="mailto:x@y.z">M</a></body></html>',
+    "/a": b'<html><head><title>A</title><link rel="canonical" href="http://site.test/"></head>'
+          b'<body><a href="/c">C</a></body></html>',
+    "/b": b'<html><head><title>B</title></head><body><a href="/" rel="nofollow">Home</a><a href="/c">C</a></body></html>',
+    "/c": b'<html><head><title>C</title></head><body></body></html>',
+}
+
+
+@pytest.fixture
+def site(mock_fetcher):
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.path)
+        if request.url.path == "/robots.txt":
+            return httpx.Response(200, content=ROBOTS)
+        if request.url.path in SITE:
+            return httpx.Response(200, content=SITE[request.url.path], headers={"Content-Type": "text/html"})
+        return httpx.Response(404)
+
+    mock_fetcher(handler)
+    return requested
+
+
+def test_normalize_url_dedups_equivalent_links():
+    assert crawler.normalize_url("HTTP://Site.Test:80/a?b=2&a=1&utm_source=x#frag") == "http://site.test/a?a=1&b=2"
+    assert crawler.normalize_url("../x", "https://site.test/a/b") == "https://site.test/x"
+    assert crawler.normalize_url("javascript:void(0)") is None
+
+
+def test_bloom_filter_has_no_false_negatives():
+    seen = crawler.BloomFilter(1000)
+    urls = [f"http://site.test/{n}" for n in range(1000)]
+    for url in urls:
+        seen.add(url)
+    assert all(url in seen for url in urls)
+    assert sum(f"http://other.test/{n}" in seen for n in range(1000)) < 10
+    restored = crawler.BloomFilter.from_dict(seen.to_dict())
+    assert all(url in restored for url in urls)
+
+
+@pytest.mark.asyncio
+async def test_crawl_respects_robots_scope_and_dedup(site):
+    lines = [line async for line in crawler.Crawler("http://site.test", ["info"], delay=0).crawl()]
+    pages, summary = lines[:-1], lines[-1]["crawl"]
+    assert sorted(page["url"] for page in pages if "skipped" not in page) == [
+        "http://site.test/", "http://site.test/a", "http://site.test/b", "http://site.test/c",
+    ]
+    assert [page["url"] for page in pages if page.get("skipped")] == ["http://site.test/private/x"]
+    assert summary["pages"] == 4 and summary["complete"]
+    assert site.count("/robots.txt") == 1
+    assert site.count("/c") == 1 and "/private/x" not in site
+
+
+@pytest.mark.asyncio
+async def test_failing_page_is_reported_and_the_crawl_goes_on(site, monkeypatch):
+    analyze = crawler.analyze_page
+
+    def analyze_page(content, url, checks):
+        if url.endswith("/b"):
+            raise RuntimeError("parser blew up")
+        return analyze(content, url, checks)
+
+    monkeypatch.setattr(crawler, "analyze_page", analyze_page)
+    lines = [line async for line in crawler.Crawler("http://site.test", ["info"], delay=0).crawl()]
+    pages = {page["url"]: page for page in lines[:-1]}
+    assert pages["http://site.test/b"] == {"url": "http://site.test/b", "depth": 1, "error": "parser blew up"}
+    assert pages["http://site.test/c"]["info"]["title"] == "C"
+    assert lines[-1]["crawl"]["pages"] == 4 and lines[-1]["crawl"]["complete"]
+
+
+@pytest.mark.asyncio
+async def test_crawl_stops_at_budget_and_resumes(site, tmp_path):
+    path = str(tmp_path / "crawl.json")
+    first = [line async for line in crawler.Crawler("http://site.test", delay=0, concurrency=1, max_pages=2, path=path).crawl()]
+    assert first[-1]["crawl"]["pages"] == 2 and not first[-1]["crawl"]["complete"]
+
+    resumed = crawler.Crawler.load(path, max_pages=50)
+    second = [line async for line in resumed.crawl()]
+    done = [line["url"] for line in first[:-1] + second[:-1] if "skipped" not in line]
+    assert sorted(done) == ["http://site.test/", "http://site.test/a", "http://site.test/b", "http://site.test/c"]
+    assert second[-1]["crawl"]["total_pages"] == 4 and second[-1]["crawl"]["complete"]
+    assert not (tmp_path / "crawl.json").exists()
+
+
+def test_resumed_crawl_grows_the_seen_filter(site, tmp_path, monkeypatch):
+    monkeypatch.setattr(crawler, "FRONTIER_LIMIT", 10)
+    path = str(tmp_path / "crawl.json")
+    first = crawler.Crawler("http://site.test", max_pages=10, path=path)
+    for n in range(first.seen.capacity):
+        first.seen.add(f"http://site.test/{n}")
+    first.save()
+
+    resumed = crawler.Crawler.load(path, max_pages=1000)
+    assert len(resumed.seen.layers) == 2
+    assert resumed.seen.capacity >= resumed.seen_budget()
+    assert "http://site.test/3" in resumed.seen
+    urls = [f"http://site.test/new/{n}" for n in range(resumed.seen_budget())]
+    for url in urls:
+        resumed.seen.add(url)
+    assert all(url in resumed.seen for url in urls)
+    assert sum(f"http://other.test/{n}" in resumed.seen for n in range(1000)) < 10
+
+
+def test_resume_rejects_other_checks_and_concurrent_crawls(site, tmp_path):
+    path = str(tmp_path / "crawl.json")
+    crawler.Crawler("http://site.test", ["info"], path=path).save()
+    with pytest.raises(ValueError):
+        crawler.Crawler.load(path, checks=["dom"])
+
+    running = crawler.Crawler.open("http://site.test", path, max_depth=3, delay=0)
+    assert running.max_depth == 3 and running.delay == 0
+    with pytest.raises(crawler.CrawlInProgress):
+        crawler.Crawler.open("http://site.test", path)
+    running._lock.close()
+    crawler.Crawler.open("http://site.test", path)._lock.close()
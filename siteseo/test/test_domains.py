@@ -0,0 +1,123 @@
+import asyncio
+from collections import OrderedDict
+import dns.resolver
+import pytest
+from siteseo.app.service import domains, email_auth
+
+
+class Rdata:
+    def __init__(self, text):
+        self.text = text
+        if text.startswith("v="):
+            self.strings = [text[:10].encode(), text[10:].encode()]
+
+    def to_text(self):
+        return self.text
+
+
+class Answer(list):
+    class rrset:
+        ttl = 300
+
+
+ZONE = {
+    ("example.com", "TXT"): ["v=spf1 include:_spf.google.com ~all", "google-site-verification=x"],
+    ("_dmarc.example.com", "TXT"): ["v=DMARC1; p=reject"],
+    ("example.com", "MX"): ["20 alt.mx.example.com.", "10 mx.example.com."],
+    ("example.com", "A"): ["93.184.216.34"],
+    ("www.example.com", "A"): ["93.184.216.34"],
+    ("_spf.google.com", "TXT"): ["v=spf1 include:_netblocks.google.com include:_netblocks2.google.com ~all"],
+    ("_netblocks.google.com", "TXT"): ["v=spf1 ip4:35.190.247.0/24 ~all"],
+    ("_netblocks2.google.com", "TXT"): ["v=spf1 ip6:2001:4860:4000::/36 ~all"],
+    ("google._domainkey.example.com", "TXT"): ["v=DKIM1; k=rsa; p=MIGfMA0GCSqGSIb3DQEBAQUAA4GNADCBiQKBgQC"],
+    ("s1._domainkey.example.com", "TXT"): ["v=DKIM1; p="],
+    ("loop.test", "TXT"): ["v=spf1 include:loop2.test -all"],
+    ("loop2.test", "TXT"): ["v=spf1 include:loop.test -all"],
+    ("many.test", "TXT"): ["v=spf1 " + " ".join(f"a:h{i}.many.test" for i in range(11)) + " -all"],
+}
+
+
+class FakeResolver:
+    def __init__(self):
+        self.queries = []
+
+    async def resolve(self, name, rdtype):
+        self.queries.append((name, rdtype))
+        await asyncio.sleep(0)
+        if (name, rdtype) not in ZONE:
+            raise dns.resolver.NoAnswer()
+        return Answer(Rdata(text) for text in ZONE[(name, rdtype)])
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    fake = FakeResolver()
+    monkeypatch.setattr(domains, "_resolver", fake)
+    monkeypatch.setattr(domains, "_cache", OrderedDict())
+    monkeypatch.setattr(domains, "_inflight", {})
+    monkeypatch.setattr(email_auth, "_memo", {})
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_domain_health_report(resolver):
+    report = await domains.domain_health("https://www.example.com/about")
+    assert report["domain"] == "example.com"
+    assert report["spf"] == "v=spf1 include:_spf.google.com ~all"
+    assert report["dmarc"] == "v=DMARC1; p=reject"
+    assert report["mx"] == ["10 mx.example.com.", "20 alt.mx.example.com."]
+    assert report["addresses"] == {"A": ["93.184.216.34"], "AAAA": []}
+    assert report["www"]["same"] is True
+
+
+@pytest.mark.asyncio
+async def test_lookups_are_cached_and_coalesced(resolver):
+    await asyncio.gather(*(domains.resolve("example.com", "A") for _ in range(20)))
+    await domains.resolve("EXAMPLE.com.", "A")
+    assert resolver.queries == [("example.com", "A")]
+    assert await domains.check_spf_record("https://example.com") == "v=spf1 include:_spf.google.com ~all"
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_expired_then_least_recently_used(resolver, monkeypatch):
+    monkeypatch.setattr(domains, "DNS_CACHE_SIZE", 2)
+    await domains.resolve("example.com", "A")
+    await domains.resolve("www.example.com", "A")
+    await domains.resolve("example.com", "A")  # a hit makes it the most recent
+    await domains.resolve("example.com", "MX")
+    assert list(domains._cache) == [("example.com", "A"), ("example.com", "MX")]
+
+    expiry, records = domains._cache[("example.com", "MX")]
+    domains._cache[("example.com", "MX")] = (0, records)
+    await domains.resolve("example.com", "TXT")
+    assert list(domains._cache) == [("example.com", "A"), ("example.com", "TXT")]
+
+
+@pytest.mark.asyncio
+async def test_email_auth_expands_spf_tree(resolver):
+    report = await email_auth.email_auth("https://example.com")
+    spf = report["spf"]
+    assert spf["valid"] and spf["all"] == "~all"
+    assert spf["lookups"] == 3
+    google = spf["tree"]["includes"][0]
+    assert [child["domain"] for child in google["includes"]] == ["_netblocks.google.com", "_netblocks2.google.com"]
+    assert report["dmarc"]["policy"] == "reject"
+    assert report["dkim"]["found"]
+    assert report["dkim"]["selectors"]["s1"]["revoked"]
+
+
+@pytest.mark.asyncio
+async def test_spf_loops_and_lookup_limit(resolver):
+    loop = await email_auth.spf_audit("loop.test")
+    assert not loop["valid"]
+    assert "loop.test: include loop" in loop["errors"]
+    many = await email_auth.spf_audit("many.test")
+    assert not many["valid"]
+    assert many["lookups"] == 11
+
+
+@pytest.mark.asyncio
+async def test_shared_includes_are_memoized_across_domains(resolver):
+    reports = [report async for report in email_auth.audit_domains(["example.com", "www.example.com"])]
+    assert len(reports) == 2
+    assert resolver.queries.count(("_spf.google.com", "TXT")) == 1
@@ -0,0 +1,18 @@
+from espy_contact.service import verify_password
+from siteseo.app.campus.app.util import hashing
+
+
+def test_hashes_verify_in_order_across_worker_slices(monkeypatch):
+    monkeypatch.setattr(hashing, "HASH_WORKERS", 2)
+    monkeypatch.setattr(hashing, "_pool", None)
+    passwords = [f"secret-{n}" for n in range(5)]
+    try:
+        pending = hashing.submit(passwords)
+        assert len(pending.futures) == 2
+        hashes = pending.result()
+        assert hashing.get_pool()._mp_context.get_start_method() == "spawn"
+    finally:
+        hashing.close()
+    assert len(hashes) == 5
+    assert all(verify_password(password, hashed) for password, hashed in zip(passwords, hashes))
+    assert not verify_password(passwords[0], hashes[1])
@@ -0,0 +1,142 @@
+from contextlib import asynccontextmanager
+import httpx
+import pytest
+from siteseo.app.service import es_imager, image_weight, play_serv
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100_000
+WEBP = b"RIFF\x00\x00\x00\x00WEBPVP8 " + b"\x00" * 500
+
+
+def image_server(request):
+    body = PNG if request.url.path.endswith(".png") else WEBP
+    if request.url.path.startswith("/norange"):
+        return httpx.Response(200, content=body, headers={"Content-Length": str(len(body))})
+    start, end = request.headers["range"].removeprefix("bytes=").split("-")
+    return httpx.Response(
+        206,
+        content=body[int(start):int(end) + 1],
+        headers={"Content-Range": f"bytes {start}-{end}/{len(body)}"},
+    )
+
+
+class FakePage:
+    url = "http://site.test/gallery"
+
+    def __init__(self, images):
+        self.images = images
+        self.calls = 0
+
+    async def eval_on_selector_all(self, selector, script):
+        self.calls += 1
+        assert selector == "img"
+        return [dict(image) for image in self.images]
+
+
+@pytest.mark.asyncio
+async def test_image_properties_take_one_round_trip(mock_fetcher):
+    mock_fetcher(image_server)
+    page = FakePage([
+        {"src": f"/{i}.png", "current_source": "", "rendered_size": [10, 10]} for i in range(300)
+    ])
+    images = await es_imager.get_image_properties(page)
+    assert page.calls == 1
+    assert len(images) == 300
+    assert images[0]["file_size"] == len(PNG)
+    assert images[0]["format"] == "png"
+
+
+@pytest.mark.asyncio
+async def test_probe_images_flags_weight_and_format(mock_fetcher):
+    mock_fetcher(image_server)
+    probes = await image_weight.probe_images(
+        ["http://cdn.test/a.png", "http://cdn.test/norange/b.webp", "http://cdn.test/a.png"],
+        max_bytes=50_000,
+    )
+    assert [p["format"] for p in probes] == ["png", "webp", "png"]
+    assert probes[0]["oversized"] and probes[0]["legacy_format"]
+    assert probes[1]["file_size"] == len(WEBP) and not probes[1]["oversized"]
+    summary = image_weight.summarize(probes)
+    assert summary["total_bytes"] == len(PNG) + len(WEBP)
+    assert summary["oversized"] == ["http://cdn.test/a.png"]
+
+
+def test_check_image_info_flags_in_bulk():
+    images = [
+        {"src": "/ok.jpg", "width": "300", "height": "200", "alt": "ok",
+         "natural_size": [600, 400], "rendered_size": [300, 200], "file_size": 1000},
+        {"src": "/huge.jpg", "width": "100", "height": "100", "alt": "huge",
+         "natural_size": [2000, 2000], "rendered_size": [100, 100], "file_size": 9000},
+        {"src": "/stretched.jpg", "width": "400", "height": "100", "alt": "",
+         "natural_size": [400, 200], "rendered_size": [400, 100]},
+        {"src": "/bare.jpg"},
+        {"src": "/logo.svg"},
+    ]
+    result = es_imager.check_image_info(images)
+    assert [d["src"] for d in result["image_details"]] == ["/ok.jpg", "/huge.jpg", "/stretched.jpg", "/bare.jpg"]
+    assert not result["correct_dimensions"]
+    assert not result["correct_aspect_ratio"]
+    assert not result["properly_sized"]
+    assert not result["required_alt_attribute"]
+    stats = result["stats"]
+    assert stats["count"] == 4
+    assert stats["missing_dimensions"] == 1
+    assert stats["missing_alt"] == 2
+    assert stats["aspect_ratio_mismatches"] == 1
+    assert stats["oversized"] == 1
+    assert stats["max_oversize_ratio"] == 20.0
+    assert stats["total_bytes"] == 10000
+
+
+def test_check_image_info_on_attributes_only():
+    result = es_imager.check_image_info([{"src": "/a.png", "width": "10", "height": "10", "alt": "a"}])
+    assert result["correct_dimensions"] and result["properly_sized"] and result["correct_aspect_ratio"]
+
+
+class FakeBrowserContext:
+    def __init__(self, page):
+        self.page = page
+
+    async def new_page(self):
+        return self.page
+
+
+class FakeLease:
+    def __init__(self, page):
+        self.page = page
+
+    @asynccontextmanager
+    async def lease(self):
+        yield FakeBrowserContext(self.page)
+
+
+class RenderedPage(FakePage):
+    async def goto(self, url, wait_until=None):
+        return httpx.Response(200)
+
+
+@pytest.mark.asyncio
+async def test_check_image_measures_rendered_images(mock_fetcher, monkeypatch):
+    mock_fetcher(image_server)
+    page = RenderedPage([
+        {"src": "/fit.png", "current_source": "", "alt": "fit", "width": "300", "height": "200",
+         "rendered_size": [300, 200], "natural_size": [600, 400]},
+        {"src": "/huge.png", "current_source": "", "alt": "huge", "width": "100", "height": "100",
+         "rendered_size": [100, 100], "natural_size": [2000, 1000]},
+    ])
+    monkeypatch.setattr(play_serv, "pool", FakeLease(page))
+    result = await play_serv.check_image("http://site.test/gallery")
+    info = result["info"]
+    assert not info["properly_sized"]
+    assert not info["correct_aspect_ratio"]
+    assert info["stats"]["oversized"] == 1
+    assert info["stats"]["aspect_ratio_mismatches"] == 1
+    assert info["stats"]["total_bytes"] == 2 * len(PNG)
+
+
+@pytest.mark.asyncio
+async def test_malformed_src_is_reported_per_image(mock_fetcher):
+    mock_fetcher(image_server)
+    probes = await image_weight.probe_images(["http://cdn.test/\x01bad.png", "http://cdn.test/a.png"])
+    assert probes[0]["error"] and probes[0]["file_size"] is None
+    assert probes[1]["file_size"] == len(PNG)
+    assert image_weight.summarize(probes)["failed"] == ["http://cdn.test/\x01bad.png"]
@@ -0,0 +1,133 @@
+import datetime
+import io
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from siteseo.app.campus.app.info import jobs
+from siteseo.app.campus.app.info.models import ImportJob
+from siteseo.app.campus.app.info.schema import ImportReport, RowError
+
+UPLOAD = b'[{"email": "a@example.com"}, {"email": "b@example.com"}]'
+
+
+@pytest.fixture
+def sessions(monkeypatch, tmp_path):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    ImportJob.__table__.create(engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(jobs, "SessionLocal", factory)
+    monkeypatch.setattr(jobs, "IMPORT_DIR", str(tmp_path))
+    return factory
+
+
+def fake_import(polls):
+    def importer(file, file_type, db, progress):
+        file.read(10)
+        progress(1, 0)
+        with jobs.SessionLocal() as poll:
+            polls.append(jobs.job_status(poll.get(ImportJob, job_ids[-1])))
+        file.read()
+        return ImportReport(inserted=1, failed=1, errors=[RowError(row=2, error="bad row")])
+
+    job_ids = []
+    return importer, job_ids
+
+
+def test_job_is_queued_claimed_and_reports_progress(sessions, monkeypatch, tmp_path):
+    polls = []
+    importer, job_ids = fake_import(polls)
+    monkeypatch.setitem(jobs.IMPORTERS, "users", importer)
+    db = sessions()
+    job = jobs.enqueue("users", io.BytesIO(UPLOAD), "json", db)
+    job_ids.append(job.id)
+    assert job.status == "queued" and job.total_bytes == len(UPLOAD)
+    assert (tmp_path / f"{job.id}.json").exists()
+
+    assert jobs._claim(db) == job.id
+    assert jobs._claim(db) is None
+    jobs.run_job(job.id)
+
+    running = polls[0]
+    assert running.status == "running" and running.rows_done == 1
+    assert 0 < running.progress < 1
+    db.expire_all()
+    done = jobs.job_status(db.get(ImportJob, job.id))
+    assert done.status == "done" and done.progress == 1.0
+    assert done.rows_done == 1 and done.rows_failed == 1 and done.errors[0].error == "bad row"
+    assert list(tmp_path.iterdir()) == []
+
+    with pytest.raises(ValueError):
+        jobs.enqueue("teachers", io.BytesIO(UPLOAD), "json", db)
+    db.close()
+
+
+def test_failed_and_stale_jobs_remove_their_files(sessions, monkeypatch, tmp_path):
+    def broken(file, file_type, db, progress):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setitem(jobs.IMPORTERS, "students", broken)
+    db = sessions()
+    failed = jobs.enqueue("students", io.BytesIO(UPLOAD), "json", db)
+    jobs.run_job(jobs._claim(db))
+    db.expire_all()
+    assert db.get(ImportJob, failed.id).error == "database went away"
+
+    stale = jobs.enqueue("students", io.BytesIO(UPLOAD), "json", db)
+    assert jobs._claim(db) == stale.id
+    stale.heartbeat_at = jobs._now() - datetime.timedelta(seconds=jobs.JOB_STALE_SECONDS + 1)
+    db.commit()
+    assert jobs._claim(db) is None
+    db.expire_all()
+    assert db.get(ImportJob, stale.id).status == "failed"
+    assert list(tmp_path.iterdir()) == []
+    db.close()
+
+
+def test_workers_run_queued_jobs_and_send_heartbeats(sessions, monkeypatch):
+    polls = []
+    importer, job_ids = fake_import(polls)
+    monkeypatch.setitem(jobs.IMPORTERS, "users", importer)
+    monkeypatch.setattr(jobs, "JOB_POLL_SECONDS", 0.05)
+    db = sessions()
+    job = jobs.enqueue("users", io.BytesIO(UPLOAD), "json", db)
+    job_ids.append(job.id)
+
+    workers = jobs.ImportWorkers(size=1)
+    workers.start()
+    try:
+        for _ in range(100):
+            db.expire_all()
+            if db.get(ImportJob, job.id).status == "done":
+                break
+            time.sleep(0.05)
+    finally:
+        workers.stop()
+    assert db.get(ImportJob, job.id).status == "done"
+
+    old = jobs._now() - datetime.timedelta(hours=1)
+    job.status, job.heartbeat_at = "running", old
+    db.commit()
+    workers._running.add(job.id)
+    workers._beat()
+    db.expire_all()
+    assert db.get(ImportJob, job.id).heartbeat_at > old
+    db.close()
+
+
+def test_job_options_reach_the_importer(sessions, monkeypatch):
+    received = {}
+
+    def importer(file, file_type, db, progress, **options):
+        received.update(options)
+        return ImportReport(inserted=0, updated=2, skipped=1)
+
+    monkeypatch.setitem(jobs.IMPORTERS, "students", importer)
+    db = sessions()
+    job = jobs.enqueue("students", io.BytesIO(UPLOAD), "json", db, on_conflict="update")
+    jobs.run_job(jobs._claim(db))
+    db.expire_all()
+    assert received == {"on_conflict": "update"}
+    assert jobs.job_status(db.get(ImportJob, job.id)).rows_done == 3
+    db.close()
@@ -0,0 +1,244 @@
+import io
+from contextlib import contextmanager
+import pytest
+from espy_contact.util.enums import AccessRoleEnum
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DataError, IntegrityError
+from siteseo.app.campus.app.info import importer
+from siteseo.app.campus.app.util import hashing
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *criteria):
+        return self
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeSession:
+    """
+    Records the inserts of a Session, per table, once they are committed.
+
+    Statements whose rows hit `reject` (emails, or ids for students) raise
+    IntegrityError like a unique or foreign key violation would. Student
+    upserts are compiled for PostgreSQL and applied to `students` by id, with
+    RETURNING xmax = 0 answered as the database would.
+    """
+
+    def __init__(self, existing_emails=(), reject=(), students=None):
+        self.existing_emails = list(existing_emails)
+        self.reject = set(reject)
+        self.committed, self.pending = [], []
+        self.students = dict(students or {})
+        self.staged = {id: dict(row) for id, row in self.students.items()}
+        self.statements = []
+        self.commits = self.rollbacks = 0
+
+    def query(self, column):
+        return FakeQuery([(email,) for email in self.existing_emails])
+
+    def execute(self, statement, params=None):
+        if params is None:
+            return self._upsert(statement)
+        rows = params
+        if any(row.get("email") in self.reject or row.get("id") in self.reject for row in rows):
+            raise IntegrityError("INSERT", rows, Exception("violates constraint"))
+        self.pending.append((statement.table.name, rows))
+
+    def _upsert(self, statement):
+        compiled = statement.compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+        self.statements.append(sql)
+        assert sql.endswith("RETURNING xmax = 0 AS inserted")
+        records = {}
+        for key, value in compiled.params.items():
+            column, index = key.rsplit("_m", 1)
+            records.setdefault(int(index), {})[column] = value
+        records = [records[index] for index in sorted(records)]
+        if any(record["id"] in self.reject for record in records):
+            raise IntegrityError("INSERT", records, Exception("violates foreign key constraint"))
+        returned = []
+        for record in records:
+            if record["id"] not in self.staged:
+                self.staged[record["id"]] = dict(record)
+                returned.append((True,))
+            elif "DO UPDATE" in sql:
+                self.staged[record["id"]].update(record)
+                returned.append((False,))
+        return returned
+
+    def commit(self):
+        self.committed += self.pending
+        self.pending = []
+        self.students = {id: dict(row) for id, row in self.staged.items()}
+        self.commits += 1
+
+    def rollback(self):
+        self.pending = []
+        self.staged = {id: dict(row) for id, row in self.students.items()}
+        self.rollbacks += 1
+
+    @contextmanager
+    def begin_nested(self):
+        mark, staged = len(self.pending), {id: dict(row) for id, row in self.staged.items()}
+        try:
+            yield
+        except Exception:
+            del self.pending[mark:]
+            self.staged = staged
+            raise
+
+    def rows(self, table):
+        return [row for name, rows in self.committed if name == table for row in rows]
+
+
+def user(email, **fields):
+    return {
+        "first_name": "Ada", "last_name": "Lovelace", "email": email, "password": "secret",
+        "role": "Student, Parent", "address.street": "1 Main", "address.city": "Lagos",
+        "address.state": "LA", "address.zip_code": "100001", "address.country": "NG", **fields,
+    }
+
+
+@pytest.fixture(autouse=True)
+def inline_hashing(monkeypatch):
+    monkeypatch.setattr(hashing, "HASH_WORKERS", 0)
+    monkeypatch.setattr(hashing, "_pool", None)
+
+
+def test_import_users_reports_bad_rows_and_duplicate_emails():
+    rows = list(enumerate([
+        user("a@example.com"),
+        user("not-an-email"),
+        user("a@example.com"),
+        user("taken@example.com"),
+        user("b@example.com"),
+    ], start=2))
+    db = FakeSession(existing_emails=["taken@example.com"])
+    progress = []
+    report = importer.import_users(rows, db, chunk_size=3, progress=lambda *counts: progress.append(counts))
+
+    assert report.inserted == 2 and report.failed == 3
+    assert [(error.row, error.email) for error in report.errors] == [
+        (3, "not-an-email"), (4, "a@example.com"), (5, "taken@example.com"),
+    ]
+    assert "email already exists" in report.errors[1].error
+    users = db.rows("appusers")
+    assert [row["email"] for row in users] == ["a@example.com", "b@example.com"]
+    assert users[0]["roles"] == [AccessRoleEnum.STUDENT, AccessRoleEnum.PARENT]
+    assert users[0]["address_id"] == db.rows("addresses")[0]["id"]
+    assert db.commits == 2 and progress == [(1, 2), (2, 3)]
+
+
+def test_constraint_violation_falls_back_to_savepoints():
+    rows = list(enumerate([user("a@example.com"), user("bad@example.com"), user("c@example.com")], start=2))
+    db = FakeSession(reject=["bad@example.com"])
+    report = importer.import_users(rows, db)
+
+    assert report.inserted == 2 and report.failed == 1
+    assert report.errors[0].row == 3 and "violates constraint" in report.errors[0].error
+    assert [row["email"] for row in db.rows("appusers")] == ["a@example.com", "c@example.com"]
+    assert len(db.rows("addresses")) == 2
+    assert db.rollbacks == 1
+
+
+def stream(text, chunk_size=4):
+    return list(importer.iter_json_array(io.StringIO(text), chunk_size))
+
+
+def test_json_array_handles_strings_and_chunk_boundaries():
+    text = '[{"name": "say \\"hi\\"", "note": "{[,]}"}, 12345.5, "tail\\\\", true, null]'
+    expected = [{"name": 'say "hi"', "note": "{[,]}"}, 12345.5, "tail\\", True, None]
+    assert all(stream(text, size) == expected for size in (1, 2, 3, 7, 64))
+    assert stream(" [ ] ") == []
+    assert stream("[12,\n 3]", 1) == [12, 3]
+
+
+@pytest.mark.parametrize("text", ['{"a": 1}', '[1, 2', '[1 2]', '[{"a": "unterminated]', '[1,, 2]', ''])
+def test_json_array_rejects_malformed_or_truncated_input(text):
+    with pytest.raises(ValueError):
+        stream(text)
+
+
+def test_read_rows_numbers_csv_and_json_records():
+    csv_rows = list(importer.read_rows(io.BytesIO("\ufeffid,city\n1,Lagos\n2,Abuja\n".encode()), "csv"))
+    assert csv_rows == [(2, {"id": "1", "city": "Lagos"}), (3, {"id": "2", "city": "Abuja"})]
+    upload = io.BytesIO(b'[{"id": 1}, {"id": 2}]')
+    assert list(importer.read_rows(upload, "json")) == [(1, {"id": 1}), (2, {"id": 2})]
+    assert not upload.closed
+    with pytest.raises(ValueError):
+        list(importer.read_rows(io.BytesIO(b""), "xml"))
+
+
+EXISTING = {"s1": {"id": "s1", "date_of_birth": "2010-01-01", "id_card": "OLD", "class_id": "c1"}}
+STUDENTS = list(enumerate([
+    {"id": "s1", "date_of_birth": "2010-01-01", "id_card": "NEW"},
+    {"id": "s2", "date_of_birth": "2011-02-02", "id_card": "A2"},
+    {"date_of_birth": "2012-03-03", "id_card": "A3"},
+    {"id": "s4", "date_of_birth": "2012-03-03", "id_card": ""},
+    {"id": "s2", "date_of_birth": "2011-02-02", "id_card": "A2-again"},
+], start=2))
+
+
+def test_student_upsert_skips_existing_students_by_default():
+    db = FakeSession(students=EXISTING)
+    progress = []
+    report = importer.import_students(STUDENTS, db, progress=lambda *counts: progress.append(counts))
+
+    assert (report.inserted, report.updated, report.skipped, report.failed) == (2, 0, 2, 1)
+    assert report.errors[0].row == 5 and "id_card" in report.errors[0].error
+    assert db.students["s1"]["id_card"] == "OLD" and db.students["s2"]["id_card"] == "A2"
+    assert len(db.students) == 3
+    assert all("ON CONFLICT (id) DO NOTHING" in sql for sql in db.statements)
+    assert db.commits == 1 and progress == [(4, 1)]
+
+
+def test_student_upsert_updates_uploaded_columns_only():
+    db = FakeSession(students=EXISTING)
+    report = importer.import_students(STUDENTS, db, chunk_size=2, on_conflict="update")
+
+    assert (report.inserted, report.updated, report.skipped, report.failed) == (2, 2, 0, 1)
+    assert db.students["s1"] == {"id": "s1", "date_of_birth": "2010-01-01", "id_card": "NEW", "class_id": "c1"}
+    assert db.students["s2"]["id_card"] == "A2-again"
+    assert "DO UPDATE SET date_of_birth = excluded.date_of_birth, id_card = excluded.id_card" in db.statements[0]
+    assert db.commits == 3
+
+
+def test_student_upsert_isolates_constraint_violations():
+    db = FakeSession(reject=["s2"])
+    report = importer.import_students(STUDENTS[1:3], db)
+
+    assert (report.inserted, report.failed) == (1, 1)
+    assert report.errors[0].row == 3 and "foreign key" in report.errors[0].error
+    assert [row["id_card"] for row in db.students.values()] == ["A3"]
+    assert db.rollbacks == 1
+
+    with pytest.raises(ValueError):
+        importer.import_students(STUDENTS, db, on_conflict="replace")
+
+
+class MalformedDateSession(FakeSession):
+    def _upsert(self, statement):
+        if "not-a-date" in statement.compile(dialect=postgresql.dialect()).params.values():
+            raise DataError("INSERT", None, Exception("invalid input syntax for type date"))
+        return super()._upsert(statement)
+
+
+def test_student_upsert_rejects_values_no_column_takes():
+    rows = list(enumerate([
+        {"id": "s1", "date_of_birth": "2010-01-01", "id_card": {"number": "A1"}},
+        {"id": "s2", "date_of_birth": "not-a-date", "id_card": "A2"},
+        {"id": "s3", "date_of_birth": "2012-03-03", "id_card": "A3"},
+    ], start=2))
+    db = MalformedDateSession()
+    report = importer.import_students(rows, db)
+
+    assert (report.inserted, report.failed) == (1, 2)
+    assert [(error.row, error.error) for error in report.errors] == [
+        (2, "not a single value: id_card"), (3, "invalid input syntax for type date"),
+    ]
+    assert list(db.students) == ["s3"]
@@ -1,6 +1,9 @@
 import pytest
+import httpx
 from unittest.mock import patch, MagicMock
 from app.service import seo_serv
+from siteseo.app.service import head_scanner, parsers, workers
+from siteseo.app.service.audit_cache import AuditCache, cache
 @pytest.mark.usefixtures("setup")
 class TestC():
     def multiply(self,x,y):
@@ -36,3 +39,202 @@ async def test_get_page_info():
         result = await seo_serv.get_page_info(url)
 
     assert result == expected_result
+
+PAGE = b"""<html><head><title> Example Domain </title>
+<meta name="description" content="Example Domain for illustration"></head>
+<body><h1>Example Domain</h1><a href="/more">click here</a></body></html>"""
+
+
+@pytest.fixture
+def pooled_client(mock_fetcher):
+    return mock_fetcher(lambda request: httpx.Response(200, content=PAGE))
+
+
+@pytest.mark.asyncio
+async def test_get_page_info_uses_pooled_client(pooled_client):
+    result = await seo_serv.get_page_info("http://example.com")
+    assert result == {
+        "title": "Example Domain",
+        "h1s": ["Example Domain"],
+        "meta_description": "Example Domain for illustration",
+    }
+
+
+@pytest.mark.asyncio
+async def test_handle_friendly_url_flags_generic_text(pooled_client):
+    result = await seo_serv.handle_friendly_url("http://example.com")
+    assert result["friendly"] is False
+    assert result["link_details"][0]["href"] == "/more"
+
+
+@pytest.mark.asyncio
+async def test_analyze_fetches_once_for_all_checks(mock_fetcher):
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request.url)
+        return httpx.Response(200, content=PAGE)
+
+    mock_fetcher(handler)
+    report = await seo_serv.analyze("http://example.com")
+    assert set(report) == set(seo_serv.CHECKS)
+    assert report["info"]["title"] == "Example Domain"
+    assert len(requests_seen) == 1
+
+
+@pytest.mark.asyncio
+async def test_analyze_rejects_unknown_checks(pooled_client):
+    with pytest.raises(ValueError):
+        await seo_serv.analyze("http://example.com", ["nope"])
+
+
+@pytest.mark.parametrize("parser", parsers.available_parsers())
+def test_run_checks_agree_across_parsers(parser):
+    assert seo_serv.run_checks(PAGE, ["info"], parser=parser)["info"] == {
+        "title": "Example Domain",
+        "h1s": ["Example Domain"],
+        "meta_description": "Example Domain for illustration",
+    }
+
+
+def test_make_soup_falls_back_when_backend_missing(monkeypatch):
+    monkeypatch.setenv("SEO_HTML_PARSER", "not-installed")
+    soup = parsers.make_soup(PAGE, "also-not-installed")
+    assert soup.title.text.strip() == "Example Domain"
+
+
+@pytest.mark.asyncio
+async def test_stream_scan_stops_after_first_h1(mock_fetcher):
+    sent = []
+
+    async def body():
+        yield PAGE
+        for _ in range(1000):
+            sent.append(1)
+            yield b"<p>" + b"x" * 4096 + b"</p>"
+
+    mock_fetcher(lambda request: httpx.Response(200, content=body()))
+    result = await seo_serv.get_page_info("http://example.com", stream=True)
+    assert result == {
+        "title": "Example Domain",
+        "h1s": ["Example Domain"],
+        "meta_description": "Example Domain for illustration",
+    }
+    assert len(sent) < 10
+
+
+def test_head_scanner_settles_missing_meta_at_body():
+    scanner = head_scanner.HeadScanner()
+    scanner.feed("<html><head><title>T</title></head><body><h1>One</h1>")
+    assert scanner.done
+    assert scanner.result() == {"title": "T", "h1s": ["One"], "meta_description": None}
+
+
+@pytest.mark.asyncio
+async def test_stale_report_is_revalidated_with_etag(mock_fetcher, monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=PAGE, headers={"ETag": '"v1"'})
+
+    mock_fetcher(handler)
+    first = await seo_serv.analyze("http://example.com", ["info"])
+    assert await seo_serv.analyze("http://example.com", ["info"]) == first
+    assert seen == [None]
+
+    monkeypatch.setattr(cache, "ttl", 0)
+    assert await seo_serv.analyze("http://example.com", ["info"]) == first
+    assert seen == [None, '"v1"']
+
+
+def test_audit_cache_evicts_least_recently_used():
+    lru = AuditCache(ttl=60, maxsize=2)
+    lru.put("a", {"n": 1})
+    lru.put("b", {"n": 2})
+    lru.get("a")
+    lru.put("c", {"n": 3})
+    assert lru.get("b") is None
+    assert lru.get("a").report == {"n": 1}
+
+
+DOM_PAGE = b"""<html><head>
+<link rel="stylesheet" href="/main.css"><link rel="stylesheet" href="/print.css" media="print">
+<script src="/app.js"></script><script src="/late.js" defer></script>
+<style>body{margin:0}</style></head>
+<body><div id="a"><p id="a" style="color:red">x</p><ul>""" + b"<li>i</li>" * 70 + b"""</ul></div>
+<script>var x = 1;</script></body></html>"""
+
+
+def test_dom_weight_single_pass_report():
+    dom = seo_serv.run_checks(DOM_PAGE, ["dom"])["dom"]
+    assert dom["node_count"] == 82
+    assert dom["max_depth"] == 5
+    assert dom["max_children"] == 70 and dom["widest_element"] == "ul"
+    assert dom["style_tag_bytes"] == len("body{margin:0}")
+    assert dom["style_attribute_bytes"] == len("color:red")
+    assert dom["inline_script_bytes"] == len("var x = 1;")
+    assert dom["render_blocking"] == [
+        {"type": "stylesheet", "url": "/main.css"},
+        {"type": "script", "url": "/app.js"},
+    ]
+    assert dom["duplicate_ids"] == ["a"]
+    assert not dom["optimized"]
+
+
+def test_dom_weight_handles_deep_nesting():
+    page = b"<div>" * 3000 + b"</div>" * 3000
+    dom = seo_serv.run_checks(page, ["dom"], parser="html.parser")["dom"]
+    assert dom["max_depth"] == 3000
+
+
+SOCIAL_PAGE = b"""<html><head>
+<meta property="og:title" content="Example"><meta property="og:image" content="/card.png">
+<meta name="twitter:card" content="summary_large_image"><meta name="twitter:image" content="/missing.png">
+<script type="application/ld+json">{"@context": "https://schema.org", "@graph": [{"@type": "Organization"}, {"@type": "WebSite"}]}</script>
+<script type="application/ld+json">{not json</script>
+</head><body>
+<div itemscope itemtype="https://schema.org/Product"><span itemprop="name">Widget</span>
+<div itemprop="offers" itemscope itemtype="https://schema.org/Offer"><meta itemprop="price" content="9.99"></div></div>
+</body></html>"""
+
+
+@pytest.mark.asyncio
+async def test_social_preview_extracts_and_validates_images(mock_fetcher):
+    def handler(request):
+        if request.url.path == "/card.png":
+            return httpx.Response(206, content=b"\x89PNG\r\n\x1a\n" + b"\x00" * 24,
+                                  headers={"Content-Range": "bytes 0-31/5000"})
+        if request.url.path == "/missing.png":
+            return httpx.Response(404)
+        return httpx.Response(200, content=SOCIAL_PAGE)
+
+    mock_fetcher(handler)
+    socials = await seo_serv.social_preview("http://example.com/page")
+    assert socials["open_graph"] == {"og:title": "Example", "og:image": "/card.png"}
+    assert socials["twitter"]["twitter:card"] == "summary_large_image"
+    assert socials["missing"] == ["og:type", "og:url"]
+    assert socials["json_ld_types"] == ["Organization", "WebSite"]
+    assert len(socials["json_ld_errors"]) == 1
+    product = socials["microdata"][0]
+    assert product["type"] == "https://schema.org/Product"
+    assert product["properties"]["name"] == ["Widget"]
+    assert product["properties"]["offers"][0]["properties"]["price"] == ["9.99"]
+    card, missing = socials["images"]
+    assert card["src"] == "http://example.com/card.png" and card["valid"] and card["format"] == "png"
+    assert not missing["valid"] and missing["error"] == "HTTP 404"
+
+
+@pytest.mark.asyncio
+async def test_analyze_runs_checks_in_process_pool(pooled_client, monkeypatch):
+    monkeypatch.setattr(workers, "ANALYSIS_WORKERS", 2)
+    monkeypatch.setattr(workers, "_pool", None)
+    try:
+        report = await seo_serv.analyze("http://example.com", ["info", "dom"])
+        assert workers.get_pool() is not None
+    finally:
+        workers.close()
+    assert report["info"]["title"] == "Example Domain"
+    assert report["dom"]["node_count"] == 7
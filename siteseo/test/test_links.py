@@ -0,0 +1,79 @@
+import asyncio
+import time
+import httpx
+import pytest
+from siteseo.app.service import link_health
+
+PAGE = b"""<html><body>
+<a href="/ok">ok</a><a href="/ok#again">same</a><a href="/gone">gone</a><a href="/moved">moved</a>
+<a href="/no-head">no head</a><a href="http://slow.test/">slow</a><a href="mailto:a@b.c">mail</a>
+</body></html>"""
+
+
+@pytest.fixture
+def site(mock_fetcher, monkeypatch):
+    monkeypatch.setattr(link_health, "_cache", {})
+    monkeypatch.setattr(link_health, "LINK_TIMEOUT", 0.2)
+    probes = []
+
+    async def handler(request):
+        path = request.url.path
+        if request.url.host == "slow.test":
+            raise httpx.ReadTimeout("timed out", request=request)
+        if path == "/page":
+            return httpx.Response(200, content=PAGE)
+        probes.append((request.method, path))
+        if path == "/gone":
+            return httpx.Response(404)
+        if path == "/moved":
+            return httpx.Response(301, headers={"Location": "/ok"})
+        if path == "/no-head" and request.method == "HEAD":
+            return httpx.Response(405)
+        return httpx.Response(200)
+
+    mock_fetcher(handler)
+    return probes
+
+
+@pytest.mark.asyncio
+async def test_page_links_are_deduped_and_classified(site):
+    report = await link_health.page_link_health("http://site.test/page")
+    assert report["checked"] == 5 and report["skipped"] == 1
+    assert [r["url"] for r in report["broken"]] == ["http://site.test/gone"]
+    assert report["timeouts"] == ["http://slow.test/"]
+    assert [(r["url"], r["redirects"]) for r in report["redirected"]] == [("http://site.test/moved", 1)]
+    assert ("GET", "/no-head") in site
+    assert site.count(("HEAD", "/ok")) == 2  # the link itself and the redirect target
+    assert not report["healthy"]
+
+
+@pytest.mark.asyncio
+async def test_malformed_href_is_a_failed_link(site):
+    report = await link_health.check_links(["/ok", "/bad\x01path"], base="http://site.test/")
+    assert report["checked"] == 2 and not report["healthy"]
+    [failed] = report["failed"]
+    assert failed["url"] == "http://site.test/bad\x01path" and "non-printable" in failed["error"]
+    assert site == [("HEAD", "/ok")]
+
+
+@pytest.mark.asyncio
+async def test_links_are_cached_across_pages(site):
+    await asyncio.gather(
+        link_health.check_links(["/ok", "/gone"], base="http://site.test/a"),
+        link_health.check_links(["/ok", "/gone"], base="http://site.test/b"),
+    )
+    await link_health.check_links(["http://site.test/ok"])
+    assert site == [("HEAD", "/ok"), ("HEAD", "/gone")]
+
+
+@pytest.mark.asyncio
+async def test_links_are_probed_as_written_and_errors_expire_sooner(site):
+    report = await link_health.check_links(
+        ["/ok?b=2&a=1&utm_source=x#top", "/ok?a=1&b=2", "http://slow.test/"], base="http://site.test/"
+    )
+    assert report["checked"] == 2
+    assert report["links"][0]["url"] == "http://site.test/ok?b=2&a=1&utm_source=x"
+    assert site == [("HEAD", "/ok")]
+    expiries = {url: expiry for url, (expiry, _) in link_health._cache.items()}
+    soon = time.monotonic() + link_health.LINK_ERROR_TTL
+    assert expiries["http://slow.test/"] <= soon < expiries["http://site.test/ok?a=1&b=2"]
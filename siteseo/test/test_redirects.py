@@ -0,0 +1,68 @@
+import httpx
+import pytest
+from siteseo.app.service import domains, redirects
+
+CHAINS = {
+    "http://site.test/": (301, "https://site.test/"),
+    "https://site.test/": (301, "https://www.site.test/"),
+    "https://www.site.test/": (200, None),
+    "https://pong.test/": (302, "http://pong.test/"),
+    "http://pong.test/": (302, "https://www.pong.test/"),
+    "https://www.pong.test/": (302, "https://pong.test/"),
+    "http://nohead.test/": (301, "/landing"),
+    "http://nohead.test/landing": (200, None),
+    "http://bad.test/": (301, "http://bad.test/\x01next"),
+}
+
+
+def handler(request):
+    if request.url.host == "nohead.test" and request.method == "HEAD":
+        return httpx.Response(405)
+    status, location = CHAINS[str(request.url)]
+    return httpx.Response(status, headers={"Location": location} if location else {})
+
+
+@pytest.mark.asyncio
+async def test_trace_records_every_hop(mock_fetcher):
+    mock_fetcher(handler)
+    chain = await redirects.trace("http://site.test/")
+    assert [hop["status"] for hop in chain["hops"]] == [301, 301, 200]
+    assert chain["final_url"] == "https://www.site.test/"
+    assert chain["redirects"] == 2
+    assert not chain["loop"] and not chain["ping_pong"]
+    assert chain["hops"][0]["http_version"] == "HTTP/1.1"
+
+
+@pytest.mark.asyncio
+async def test_trace_detects_loop_and_ping_pong(mock_fetcher):
+    mock_fetcher(handler)
+    chain = await redirects.trace("https://pong.test/")
+    assert chain["loop"]
+    assert chain["ping_pong"]
+
+
+@pytest.mark.asyncio
+async def test_trace_falls_back_to_get_and_resolves_relative_location(mock_fetcher):
+    mock_fetcher(handler)
+    chains = [chain async for chain in redirects.trace_many(["http://nohead.test/"])]
+    assert chains[0]["final_url"] == "http://nohead.test/landing"
+    assert await domains.has_redirect("http://site.test/") == "https://site.test/"
+
+
+@pytest.mark.asyncio
+async def test_too_many_only_when_the_limit_cuts_a_redirect(mock_fetcher):
+    mock_fetcher(handler)
+    exact = await redirects.trace("http://site.test/", max_hops=2)
+    assert exact["final_status"] == 200 and not exact["too_many"]
+    cut = await redirects.trace("http://site.test/", max_hops=1)
+    assert cut["too_many"] and cut["final_status"] == 301
+    assert not (await redirects.trace("https://www.site.test/", max_hops=0))["too_many"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_location_is_reported_on_its_chain(mock_fetcher):
+    mock_fetcher(handler)
+    chains = [chain async for chain in redirects.trace_many(["http://bad.test/", "http://site.test/"])]
+    assert len(chains) == 2
+    bad = next(chain for chain in chains if chain["url"] == "http://bad.test/")
+    assert "Invalid URL" in bad["error"] and not bad["too_many"]
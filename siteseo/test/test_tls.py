@@ -0,0 +1,104 @@
+import asyncio
+import datetime
+import ssl
+from collections import OrderedDict
+import pytest
+import pytest_asyncio
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from siteseo.app.service import tls_scan
+
+
+@pytest.fixture(scope="module")
+def self_signed(tmp_path_factory):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=10))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    directory = tmp_path_factory.mktemp("tls")
+    cert_path, key_path = directory / "cert.pem", directory / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ))
+    return str(cert_path), str(key_path)
+
+
+@pytest_asyncio.fixture
+async def tls_server(self_signed, monkeypatch):
+    monkeypatch.setattr(tls_scan, "_handshakes", OrderedDict())
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    context.load_cert_chain(*self_signed)
+
+    async def respond(reader, writer):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(b"HTTP/1.1 200 OK\r\nStrict-Transport-Security: max-age=31536000; includeSubDomains\r\n\r\n")
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(respond, "127.0.0.1", 0, ssl=context)
+    yield server.sockets[0].getsockname()[1]
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_self_signed_certificate_is_reported(tls_server):
+    report = await tls_scan.scan_host("localhost", tls_server)
+    assert not report["chain_valid"]
+    assert "self" in report["verify_error"]
+    cert = report["certificate"]
+    assert cert["self_signed"] and cert["covers_apex"] and not cert["covers_www"]
+    assert cert["expiring_soon"] and not cert["expired"]
+    assert report["hsts"]["enabled"] and report["hsts"]["max_age"] == 31536000
+    assert report["protocols"]["TLSv1.2"] and report["protocols"]["TLSv1.3"]
+    assert not report["protocols"]["TLSv1.1"]
+    assert report["deprecated_protocols"] == []
+
+
+@pytest.mark.asyncio
+async def test_trusted_ca_validates_chain_and_results_are_cached(tls_server, self_signed):
+    report = await tls_scan.scan_host("localhost", tls_server, cafile=self_signed[0])
+    assert report["chain_valid"] and report["verify_error"] is None
+    assert await tls_scan.scan_host("localhost", tls_server, cafile=self_signed[0]) is report
+
+
+@pytest.mark.asyncio
+async def test_handshake_cache_keeps_most_recent_hosts(tls_server, self_signed, monkeypatch):
+    monkeypatch.setattr(tls_scan, "TLS_CACHE_SIZE", 1)
+    await tls_scan.scan_host("localhost", tls_server)
+    report = await tls_scan.scan_host("localhost", tls_server, cafile=self_signed[0])
+    assert list(tls_scan._handshakes) == [("localhost", tls_server, self_signed[0])]
+    assert await tls_scan.scan_host("localhost", tls_server, cafile=self_signed[0]) is report
+
+@pytest.mark.asyncio
+async def test_unparseable_certificate_fails_only_its_host(tls_server, monkeypatch):
+    def broken(der, host):
+        raise ValueError("error parsing asn1 value")
+
+    monkeypatch.setattr(tls_scan, "_certificate", broken)
+    reports = [report async for report in tls_scan.scan_many([f"localhost:{tls_server}", "https://[::1"])]
+    assert len(reports) == 2
+    report = next(report for report in reports if report.get("port") == tls_server)
+    assert report["error"] == "Invalid certificate: error parsing asn1 value"
+    assert "certificate" not in report and not tls_scan._handshakes
+    assert {"url": "https://[::1", "error": "Invalid IPv6 URL"} in reports